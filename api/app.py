@@ -0,0 +1,10 @@
+from src.retreival import InformationRetrieval
+from src.routes import create_app
+
+app_instance = InformationRetrieval()
+
+app = create_app(app_instance)
+
+
+# if __name__ == '__main__':
+#     app.run(debug=True)
@@ -0,0 +1,466 @@
+import os
+import json
+import mmap
+import time
+import heapq
+import hashlib
+import struct
+from typing import Dict, Iterable, List, Tuple, Union
+
+# File layout (little endian):
+#   header      magic, version, kind, number of docs, number of terms, doc table offset, term dictionary offset
+#   postings    per term: df, then per doc: doc gap, tf (inverted) or count + position gaps (positional)
+#   doc table   per doc: doc number, length, utf-8 doc id (e.g. "12_17")
+#   dictionary  sorted terms: length, utf-8 term, gap to the previous term's postings offset
+# Every integer after the header is a variable-byte integer (7 bits per byte, high bit = more bytes).
+
+MAGIC = b"IRIX"
+VERSION = 1
+INVERTED = 0
+POSITIONAL = 1
+HEADER = struct.Struct("<4sBBIIQQ")
+
+Postings = Dict[str, Union[int, List[int]]]
+
+
+def encode_varint(value: int, out: bytearray) -> None:
+    """
+    Appends value to out as a variable-byte integer.
+
+    Args:
+        value (int): non negative integer
+        out (bytearray): output buffer
+    """
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(buf, pos: int) -> Tuple[int, int]:
+    """
+    Decodes a variable-byte integer from buf.
+
+    Args:
+        buf: bytes like object
+        pos (int): offset of the first byte
+
+    Returns:
+        Tuple[int, int]: decoded value and offset of the next integer
+    """
+    byte = buf[pos]
+    pos += 1
+    if byte < 0x80:
+        return byte, pos
+    value = byte & 0x7F
+    shift = 7
+    while True:
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def decode_postings(buf, pos: int, positional: bool, docs: Dict[int, str]) -> Postings:
+    """
+    Decodes one term's postings starting at pos.
+
+    Args:
+        buf: bytes like object holding the index
+        pos (int): offset of the term's postings
+        positional (bool): True for positional postings
+        docs (Dict[int, str]): doc number -> doc_id
+
+    Returns:
+        Postings: doc_id -> tf or positions
+    """
+    df, pos = decode_varint(buf, pos)
+    postings: Postings = {}
+    number = 0
+    for _ in range(df):
+        gap, pos = decode_varint(buf, pos)
+        number += gap
+        if positional:
+            count, pos = decode_varint(buf, pos)
+            positions = []
+            position = 0
+            for _ in range(count):
+                gap, pos = decode_varint(buf, pos)
+                position += gap
+                positions.append(position)
+            postings[docs[number]] = positions
+        else:
+            postings[docs[number]], pos = decode_varint(buf, pos)
+    return postings
+
+
+def doc_number(doc_id: str) -> int:
+    """
+    Returns the integer part of a "N_name" document ID.
+    """
+    return int(doc_id.split("_")[0])
+
+
+def doc_name(doc_id: str) -> str:
+    """
+    Returns the document name of a "N_name" document ID, as the models report it.
+    The name is everything after the first underscore, e.g. "notes_v2" for "3_notes_v2".
+    """
+    return doc_id.split("_", 1)[1]
+
+
+def read_directory(buf, file_name: str) -> Tuple[bool, Dict[int, str], List[str], List[int]]:
+    """
+    Parses the header, doc table and term dictionary of a binary index.
+
+    Args:
+        buf: bytes like object holding the index
+        file_name (str): index file, used in error messages
+
+    Returns:
+        Tuple: positional flag, doc number -> doc_id, sorted terms and their postings offsets
+    """
+    magic, version, kind, num_docs, num_terms, docs_offset, terms_offset = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{file_name} is not a binary index (version {VERSION})")
+
+    docs: Dict[int, str] = {}
+    pos = docs_offset
+    for _ in range(num_docs):
+        number, pos = decode_varint(buf, pos)
+        length, pos = decode_varint(buf, pos)
+        docs[number] = bytes(buf[pos:pos + length]).decode("utf-8")
+        pos += length
+
+    terms: List[str] = []
+    offsets: List[int] = []
+    offset = 0
+    pos = terms_offset
+    for _ in range(num_terms):
+        length, pos = decode_varint(buf, pos)
+        terms.append(bytes(buf[pos:pos + length]).decode("utf-8"))
+        pos += length
+        gap, pos = decode_varint(buf, pos)
+        offset += gap
+        offsets.append(offset)
+    return kind == POSITIONAL, docs, terms, offsets
+
+
+def encode_postings(postings: Postings, positional: bool, docs: Dict[int, str]) -> bytearray:
+    """
+    Encodes one term's postings, by document number, and records their documents in docs.
+
+    Args:
+        postings (Postings): doc_id -> tf or positions
+        positional (bool): True for positional postings
+        docs (Dict[int, str]): doc table, doc number -> doc_id, filled in
+
+    Returns:
+        bytearray: encoded postings
+    """
+    entries = sorted((doc_number(doc_id), doc_id, value) for doc_id, value in postings.items())
+    out = bytearray()
+    encode_varint(len(entries), out)
+    prev_doc = 0
+    for number, doc_id, value in entries:
+        docs[number] = doc_id
+        encode_varint(number - prev_doc, out)
+        prev_doc = number
+        if positional:
+            encode_varint(len(value), out)
+            prev_pos = 0
+            for position in value:
+                encode_varint(position - prev_pos, out)
+                prev_pos = position
+        else:
+            encode_varint(value, out)
+    return out
+
+
+def encode_dictionary_entry(term: str, gap: int, out: bytearray) -> None:
+    """
+    Appends a term and the gap to the previous term's postings offset to the dictionary.
+    """
+    term_bytes = term.encode("utf-8")
+    encode_varint(len(term_bytes), out)
+    out += term_bytes
+    encode_varint(gap, out)
+
+
+def encode_doc_table(docs: Dict[int, str]) -> bytearray:
+    """
+    Encodes the doc table, by document number.
+    """
+    table = bytearray()
+    for number in sorted(docs):
+        doc_bytes = docs[number].encode("utf-8")
+        encode_varint(number, table)
+        encode_varint(len(doc_bytes), table)
+        table += doc_bytes
+    return table
+
+
+def pack_header(positional: bool, num_docs: int, num_terms: int, docs_offset: int, table_size: int) -> bytes:
+    """
+    Returns the file header; the term dictionary follows the doc table.
+    """
+    return HEADER.pack(
+        MAGIC, VERSION, POSITIONAL if positional else INVERTED,
+        num_docs, num_terms, docs_offset, docs_offset + table_size,
+    )
+
+
+class BinaryIndexWriter:
+    def __init__(self, file_name: str, positional: bool) -> None:
+        """
+        Streams an index to file_name. Terms must be added in sorted order.
+
+        Args:
+            file_name (str): output file
+            positional (bool): True for positional postings, False for term frequencies
+        """
+        self.file_name = file_name
+        self.positional = positional
+        # written next to the target and moved into place on close, so readers that
+        # still map the previous file never see it truncated
+        self.file = open(file_name + ".tmp", "wb")
+        self.file.write(b"\0" * HEADER.size)
+        self.offset = HEADER.size
+        self.docs: Dict[int, str] = {}
+        self.dictionary = bytearray()
+        self.num_terms = 0
+        self.last_term = None
+        self.last_offset = 0
+
+    def add_term(self, term: str, postings: Postings) -> None:
+        """
+        Encodes and writes the postings of one term.
+
+        Args:
+            term (str): index term, greater than the previous term
+            postings (Postings): doc_id -> tf or positions
+        """
+        out = encode_postings(postings, self.positional, self.docs)
+        self.add_encoded(term, out)
+
+    def add_encoded(self, term: str, data: bytes) -> None:
+        """
+        Writes the already encoded postings of one term, e.g. copied from another index
+        file. Their documents must be in the doc table (docs) already.
+
+        Args:
+            term (str): index term, greater than the previous term
+            data (bytes): encoded postings
+        """
+        if self.last_term is not None and term <= self.last_term:
+            raise ValueError(f"Terms must be added in sorted order: '{term}' after '{self.last_term}'")
+        self.file.write(data)
+        encode_dictionary_entry(term, self.offset - self.last_offset, self.dictionary)
+        self.last_offset = self.offset
+        self.offset += len(data)
+        self.last_term = term
+        self.num_terms += 1
+
+    def close(self) -> None:
+        """
+        Writes the doc table, the term dictionary and the header.
+        """
+        table = encode_doc_table(self.docs)
+        self.file.write(table)
+        self.file.write(self.dictionary)
+        self.file.seek(0)
+        self.file.write(pack_header(self.positional, len(self.docs), self.num_terms, self.offset, len(table)))
+        self.file.close()
+        os.replace(self.file_name + ".tmp", self.file_name)
+
+    def __enter__(self) -> "BinaryIndexWriter":
+        return self
+
+    def __exit__(self, exc_type, *args) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+            os.remove(self.file_name + ".tmp")
+
+
+class BinaryIndexReader:
+    def __init__(self, file_name: str) -> None:
+        """
+        Reads an index written by BinaryIndexWriter.
+
+        Args:
+            file_name (str): index file
+        """
+        with open(file_name, "rb") as f:
+            self.buf = f.read()
+        self.positional, self.docs, terms, offsets = read_directory(self.buf, file_name)
+        self.num_docs = len(self.docs)
+        self.num_terms = len(terms)
+        self.offsets: Dict[str, int] = dict(zip(terms, offsets))
+
+    def postings(self, term: str) -> Postings:
+        """
+        Decodes the postings of a term.
+
+        Args:
+            term (str): index term
+
+        Returns:
+            Postings: doc_id -> tf or positions, empty if the term is not indexed
+        """
+        if term not in self.offsets:
+            return {}
+        return decode_postings(self.buf, self.offsets[term], self.positional, self.docs)
+
+    def load(self) -> Dict[str, Postings]:
+        """
+        Decodes the whole index.
+        """
+        return {term: self.postings(term) for term in self.offsets}
+
+
+def write_index(file_name: str, index: Dict[str, Postings], positional: bool) -> None:
+    """
+    Writes an in-memory index in the binary format.
+
+    Args:
+        file_name (str): output file
+        index (Dict[str, Postings]): term -> doc_id -> tf or positions
+        positional (bool): True for positional postings
+    """
+    with BinaryIndexWriter(file_name, positional) as writer:
+        for term in sorted(index):
+            writer.add_term(term, index[term])
+
+
+def update_index(file_name: str, doc_id: str, old_terms: Iterable[str], postings: Dict[str, Postings]) -> None:
+    """
+    Replaces one document's postings in a binary index file without decoding the rest
+    of it: only the terms the document had (old_terms) or has now (postings) are
+    decoded, edited and re-encoded, every other term's postings are copied byte for
+    byte. The result is the file write_index writes for the edited index.
+
+    Args:
+        file_name (str): binary index file
+        doc_id (str): document ID
+        old_terms (Iterable[str]): terms of the document's previous postings
+        postings (Dict[str, Postings]): the document's own index, term -> doc_id -> tf or
+            positions, empty to remove the document
+    """
+    with open(file_name, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        positional, docs, terms, offsets = read_directory(buf, file_name)
+        ends = offsets[1:] + [HEADER.unpack_from(buf, 0)[5]]
+        positions = {term: i for i, term in enumerate(terms)}
+        touched = set(old_terms) | set(postings)
+        new_terms = sorted(term for term in postings if term not in positions)
+        with BinaryIndexWriter(file_name, positional) as writer:
+            writer.docs.update((number, doc) for number, doc in docs.items() if doc != doc_id)
+            for term in heapq.merge(terms, new_terms):
+                i = positions.get(term)
+                if term not in touched:
+                    writer.add_encoded(term, buf[offsets[i]:ends[i]])
+                    continue
+                entries = decode_postings(buf, offsets[i], positional, docs) if i is not None else {}
+                entries.pop(doc_id, None)
+                entries.update(postings.get(term, {}))
+                if entries:
+                    writer.add_term(term, entries)
+
+
+def index_digest(index: Dict[str, Postings], positional: bool) -> str:
+    """
+    Returns the sha256 of the file write_index would write for an in-memory index,
+    without writing it: the terms, documents and values are hashed in the canonical
+    (sorted) order of the format, so it equals the digest of the file's bytes.
+
+    Args:
+        index (Dict[str, Postings]): term -> doc_id -> tf or positions
+        positional (bool): True for positional postings
+
+    Returns:
+        str: hex digest
+    """
+    docs: Dict[int, str] = {}
+    postings: List[bytearray] = []
+    dictionary = bytearray()
+    offset = HEADER.size
+    last_offset = 0
+    for term in sorted(index):
+        data = encode_postings(index[term], positional, docs)
+        postings.append(data)
+        encode_dictionary_entry(term, offset - last_offset, dictionary)
+        last_offset = offset
+        offset += len(data)
+    table = encode_doc_table(docs)
+    digest = hashlib.sha256(pack_header(positional, len(docs), len(postings), offset, len(table)))
+    for data in postings:
+        digest.update(data)
+    digest.update(table)
+    digest.update(dictionary)
+    return digest.hexdigest()
+
+
+def read_index(file_name: str) -> Dict[str, Postings]:
+    """
+    Reads a binary index fully into memory.
+    """
+    return BinaryIndexReader(file_name).load()
+
+
+def convert_json_index(json_file: str, bin_file: str, positional: bool) -> None:
+    """
+    Converts a saved JSON index (docs/inv-index.json, docs/pos-index.json) to the binary format.
+
+    Args:
+        json_file (str): JSON index file
+        bin_file (str): binary index file to write
+        positional (bool): True for positional postings
+    """
+    with open(json_file, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    write_index(bin_file, index, positional)
+
+
+def compare_formats(json_file: str, bin_file: str) -> Dict[str, float]:
+    """
+    Compares file size and full load time of the JSON and binary versions of an index.
+
+    Args:
+        json_file (str): JSON index file
+        bin_file (str): binary index file
+
+    Returns:
+        Dict[str, float]: sizes in bytes and load times in seconds
+    """
+    start = time.perf_counter()
+    with open(json_file, "r", encoding="utf-8") as f:
+        json_index = json.load(f)
+    json_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bin_index = read_index(bin_file)
+    bin_time = time.perf_counter() - start
+
+    if json_index != bin_index:
+        raise ValueError(f"{bin_file} does not match {json_file}")
+    json_size = os.path.getsize(json_file)
+    bin_size = os.path.getsize(bin_file)
+    return {
+        "json_bytes": json_size,
+        "binary_bytes": bin_size,
+        "size_ratio": round(json_size / bin_size, 2),
+        "json_load_seconds": round(json_time, 4),
+        "binary_load_seconds": round(bin_time, 4),
+    }
+
+
+if __name__ == "__main__":
+    for json_file, bin_file, positional in [
+        ("./docs/inv-index.json", "./docs/inv-index.bin", False),
+        ("./docs/pos-index.json", "./docs/pos-index.bin", True),
+    ]:
+        convert_json_index(json_file, bin_file, positional)
+        print(json_file, compare_formats(json_file, bin_file))
@@ -0,0 +1,165 @@
+import sys
+import json
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Union
+from src.indexer.binary_index import doc_number
+
+
+class PostingList(Mapping):
+    __slots__ = ("index", "start", "end")
+
+    def __init__(self, index: "CompactIndex", start: int, end: int) -> None:
+        """
+        View of one term's postings inside a CompactIndex, sorted by integer doc ID.
+        Reads like the dict it replaces: doc_id -> tf (inverted) or positions (positional).
+
+        Args:
+            index (CompactIndex): index holding the arrays
+            start (int): first posting of the term
+            end (int): one past the last posting of the term
+        """
+        self.index = index
+        self.start = start
+        self.end = end
+
+    def _find(self, doc_id: str) -> int:
+        number = doc_number(doc_id)
+        i = bisect_left(self.index.docs, number, self.start, self.end)
+        if i < self.end and self.index.docs[i] == number:
+            return i
+        return -1
+
+    def __getitem__(self, doc_id: str) -> Union[int, array]:
+        i = self._find(doc_id)
+        if i < 0:
+            raise KeyError(doc_id)
+        return self.index.value(i)
+
+    def __contains__(self, doc_id) -> bool:
+        return self._find(doc_id) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        doc_ids = self.index.doc_ids
+        return (doc_ids[number] for number in self.index.docs[self.start:self.end])
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+
+class CompactIndex(Mapping):
+    def __init__(self, index: Dict[str, Dict[str, Union[int, List[int]]]], positional: bool) -> None:
+        """
+        Array-backed, read-only copy of an InvertedIndex/PositionalIndex index.
+        All postings live in flat array('I') buffers (integer doc IDs, tfs or
+        positions) laid out term after term; terms map to their first posting and
+        are read through __slots__ PostingList views instead of nested dicts and lists.
+
+        Only the memory benchmark builds it: the retrieval models read the memory-mapped
+        binary index (MappedIndex) instead.
+
+        Args:
+            index (Dict[str, Dict[str, Union[int, List[int]]]]): term -> doc_id -> tf or positions
+            positional (bool): True for positional postings
+        """
+        self.positional = positional
+        self.doc_ids: Dict[int, str] = {}
+        self.terms: Dict[str, int] = {}
+        self.starts = array("I", [0])
+        self.docs = array("I")
+        self.values = array("I")
+        # positional only: postings i's positions are values[offsets[i]:offsets[i + 1]]
+        self.offsets = array("I", [0]) if positional else None
+        for term, postings in index.items():
+            entries = sorted((doc_number(doc_id), doc_id, value) for doc_id, value in postings.items())
+            for number, doc_id, value in entries:
+                self.doc_ids[number] = doc_id
+                self.docs.append(number)
+                if positional:
+                    self.values.extend(value)
+                    self.offsets.append(len(self.values))
+                else:
+                    self.values.append(value)
+            self.terms[term] = len(self.starts) - 1
+            self.starts.append(len(self.docs))
+
+    def value(self, i: int) -> Union[int, array]:
+        """
+        Returns the tf or positions of posting i.
+        """
+        if self.offsets is None:
+            return self.values[i]
+        return self.values[self.offsets[i]:self.offsets[i + 1]]
+
+    def __getitem__(self, term: str) -> PostingList:
+        slot = self.terms[term]
+        return PostingList(self, self.starts[slot], self.starts[slot + 1])
+
+    def __contains__(self, term) -> bool:
+        return term in self.terms
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.terms)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+
+def deep_size(obj, seen: set = None) -> int:
+    """
+    Approximate memory held by obj and everything it references, counting shared objects once.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_size(obj.__dict__, seen)
+    return size
+
+
+def bytes_per_posting(index: Dict[str, Dict[str, Union[int, List[int]]]], positional: bool) -> Dict[str, float]:
+    """
+    Reports the memory of the nested dict index and of its CompactIndex copy
+    per posting (term, doc pair) and, for positional indexes, per position.
+
+    Args:
+        index (Dict[str, Dict[str, Union[int, List[int]]]]): term -> doc_id -> tf or positions
+        positional (bool): True for positional postings
+
+    Returns:
+        Dict[str, float]: total bytes and bytes per posting/position of both representations
+    """
+    postings = sum(len(docs) for docs in index.values())
+    positions = sum(len(p) for docs in index.values() for p in docs.values()) if positional else postings
+    # interned strings (terms, doc ids) are shared by both representations
+    shared = set()
+    for term, docs in index.items():
+        shared.add(id(term))
+        shared.update(id(doc_id) for doc_id in docs)
+    dict_bytes = deep_size(index, set(shared))
+    compact_bytes = deep_size(CompactIndex(index, positional), set(shared))
+    return {
+        "postings": postings,
+        "positions": positions,
+        "dict_bytes": dict_bytes,
+        "compact_bytes": compact_bytes,
+        "dict_bytes_per_posting": round(dict_bytes / postings, 1),
+        "compact_bytes_per_posting": round(compact_bytes / postings, 1),
+        "dict_bytes_per_position": round(dict_bytes / positions, 1),
+        "compact_bytes_per_position": round(compact_bytes / positions, 1),
+    }
+
+
+if __name__ == "__main__":
+    for file_name, positional in [("./docs/inv-index.json", False), ("./docs/pos-index.json", True)]:
+        with open(file_name, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        print(file_name, bytes_per_posting(index, positional))
@@ -0,0 +1,108 @@
+import time
+import random
+from typing import Iterable, Iterator, Dict
+
+
+class DocBitmap:
+    __slots__ = ("bits", "negated", "size")
+
+    def __init__(self, bits: int, size: int, negated: bool = False) -> None:
+        """
+        Set of dense document ordinals (0 .. size - 1) held as the bits of a Python int,
+        so AND/OR/AND-NOT run as word-parallel big-integer operations. A negated bitmap
+        stands for the complement of its bits; complements are only materialized when
+        the set is read, and combining negated operands never builds one.
+
+        Args:
+            bits (int): bit i is set for ordinal i
+            size (int): number of documents in the collection
+            negated (bool): True if the set is everything except bits
+        """
+        self.bits = bits
+        self.size = size
+        self.negated = negated
+
+    @classmethod
+    def from_ordinals(cls, ordinals: Iterable[int], size: int) -> "DocBitmap":
+        buffer = bytearray((size + 7) // 8)
+        for i in ordinals:
+            buffer[i >> 3] |= 1 << (i & 7)
+        return cls(int.from_bytes(buffer, "little"), size)
+
+    def materialize(self) -> int:
+        """
+        Returns the plain bits of the set, applying a pending complement.
+        """
+        if self.negated:
+            return ((1 << self.size) - 1) & ~self.bits
+        return self.bits
+
+    def __invert__(self) -> "DocBitmap":
+        return DocBitmap(self.bits, self.size, not self.negated)
+
+    def __and__(self, other: "DocBitmap") -> "DocBitmap":
+        a, b = self.bits, other.bits
+        if not self.negated and not other.negated:
+            return DocBitmap(a & b, self.size)
+        if not self.negated:
+            return DocBitmap(a & ~b, self.size)
+        if not other.negated:
+            return DocBitmap(b & ~a, self.size)
+        # NOT a AND NOT b = NOT (a OR b)
+        return DocBitmap(a | b, self.size, negated=True)
+
+    def __or__(self, other: "DocBitmap") -> "DocBitmap":
+        a, b = self.bits, other.bits
+        if not self.negated and not other.negated:
+            return DocBitmap(a | b, self.size)
+        # a OR NOT b = NOT (b AND NOT a), NOT a OR NOT b = NOT (a AND b)
+        if not self.negated:
+            return DocBitmap(b & ~a, self.size, negated=True)
+        if not other.negated:
+            return DocBitmap(a & ~b, self.size, negated=True)
+        return DocBitmap(a & b, self.size, negated=True)
+
+    def __sub__(self, other: "DocBitmap") -> "DocBitmap":
+        return self & ~other
+
+    def __len__(self) -> int:
+        count = self.bits.bit_count()
+        return self.size - count if self.negated else count
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __iter__(self) -> Iterator[int]:
+        """
+        Yields the ordinals in the set in ascending order.
+        """
+        data = self.materialize().to_bytes((self.size + 7) // 8, "little")
+        for i, byte in enumerate(data):
+            while byte:
+                low = byte & -byte
+                yield (i << 3) + low.bit_length() - 1
+                byte ^= low
+
+
+def benchmark(num_docs: int = 200_000, density: float = 0.3, rounds: int = 20) -> Dict[str, float]:
+    """
+    Times "a AND NOT b OR NOT c" on Python sets (building the complement from the
+    whole collection, as BooleanModel.not_op did) against DocBitmap.
+    """
+    all_docs = list(range(num_docs))
+    a, b, c = (random.sample(all_docs, int(num_docs * density)) for _ in range(3))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        expected = set(a).intersection(set(all_docs).difference(set(b))).union(set(all_docs).difference(set(c)))
+    set_time = (time.perf_counter() - start) / rounds
+    ba, bb, bc = (DocBitmap.from_ordinals(x, num_docs) for x in (a, b, c))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        found = ((ba & ~bb) | ~bc).materialize()
+    bitmap_time = (time.perf_counter() - start) / rounds
+    assert set(DocBitmap(found, num_docs)) == expected
+    return {"docs": num_docs, "set_ms": round(set_time * 1000, 3), "bitmap_ms": round(bitmap_time * 1000, 3)}
+
+
+if __name__ == "__main__":
+    print(benchmark())
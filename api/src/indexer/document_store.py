@@ -0,0 +1,92 @@
+import os
+import json
+from typing import Any, Dict, List
+from src.indexer.binary_index import doc_name
+
+DOC_STORE_FILE = "./docs/doc-store.json"
+RECORD_FIELDS = ("doc_id", "path", "tokens", "unique_tokens", "stemmed_tokens", "static_summary")
+
+
+class DocumentStore:
+    def __init__(self, file_name: str = DOC_STORE_FILE) -> None:
+        """
+        Document ID -> record (path, token counts, static summary) store, loaded once.
+        Records are also reachable by the document name the models return (e.g. "12").
+        "tokens" is the document length in index terms (the sum of its term frequencies).
+
+        Args:
+            file_name (str): JSON file the store is saved to
+        """
+        self.file_name = file_name
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.names: Dict[str, str] = {}
+        self.load()
+
+    def load(self) -> None:
+        """
+        Loads the saved store, if it exists.
+        """
+        if os.path.exists(self.file_name):
+            with open(self.file_name, "r", encoding="utf-8") as f:
+                for record in json.load(f):
+                    self.put(record)
+
+    def save(self) -> None:
+        """
+        Saves the store as a list of records.
+        """
+        os.makedirs(os.path.dirname(self.file_name), exist_ok=True)
+        with open(self.file_name, "w", encoding="utf-8") as f:
+            json.dump(list(self.docs.values()), f, indent=4)
+
+    def put(self, record: Dict[str, Any]) -> None:
+        """
+        Adds or replaces a document record. Only RECORD_FIELDS are kept, so a
+        document's logged metadata can be passed as it is.
+
+        Args:
+            record (Dict[str, Any]): record with at least a "doc_id" of the form "N_name"
+        """
+        record = {field: record.get(field) for field in RECORD_FIELDS}
+        doc_id = record["doc_id"]
+        self.docs[doc_id] = record
+        self.names[doc_name(doc_id)] = doc_id
+
+    def remove(self, doc_id: str) -> None:
+        """
+        Removes a document record.
+        """
+        self.docs.pop(doc_id, None)
+        name = doc_name(doc_id)
+        if self.names.get(name) == doc_id:
+            del self.names[name]
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.docs
+
+    def get(self, doc_id: str) -> Dict[str, Any]:
+        """
+        Returns the record of a document ID, an empty dict if unknown.
+        """
+        return self.docs.get(doc_id, {})
+
+    def by_name(self, name: str) -> Dict[str, Any]:
+        """
+        Returns the record of a document name as reported by the models.
+        """
+        return self.docs.get(self.names.get(str(name), ""), {})
+
+    def length(self, name: str) -> int:
+        """
+        Returns the length in index terms of a document name, 0 if unknown.
+        """
+        return self.by_name(name).get("tokens") or 0
+
+    def summary(self, name: str) -> str:
+        """
+        Returns the static summary of a document name, "" if unknown.
+        """
+        return self.by_name(name).get("static_summary") or ""
+
+    def summaries(self, names: List[str]) -> List[str]:
+        return [self.summary(name) for name in names]
@@ -5,6 +5,7 @@ import logging
 from typing import   Dict, List
 from src.utils import *
 from src.logger import log_message
+from src.indexer.compact_index import CompactIndex
 
 
 class InvertedIndex:
@@ -47,6 +48,13 @@ class InvertedIndex:
         # for token in tokens:
             # self.sort_token_counts(token)
        
+    def to_compact(self) -> CompactIndex:
+        """
+        Returns an array-backed, read-only copy of the index with the same dict-like read API.
+        Used by the memory benchmark only.
+        """
+        return CompactIndex(self.index, positional=False)
+
     def sort_token_counts(self, token: str) -> None:
         """
         Sorts the token counts for a given token in descending order.
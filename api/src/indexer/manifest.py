@@ -0,0 +1,83 @@
+import os
+import json
+import hashlib
+from typing import Any, Dict
+
+MANIFEST_FILE = "./docs/manifest.json"
+
+
+def file_hash(file_name: str, block_size: int = 1024 * 1024) -> str:
+    """
+    Returns the SHA-256 hex digest of a file's contents, read in blocks.
+    """
+    digest = hashlib.sha256()
+    with open(file_name, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IndexManifest:
+    def __init__(self, file_name: str = MANIFEST_FILE) -> None:
+        """
+        File path -> (document ID, content hash, size, mtime) of every indexed file.
+        A file whose size and mtime are unchanged is current without reading it;
+        otherwise its contents are hashed and compared.
+
+        Args:
+            file_name (str): JSON file the manifest is saved to
+        """
+        self.file_name = file_name
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(file_name):
+            with open(file_name, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.file_name), exist_ok=True)
+        with open(self.file_name, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=4)
+
+    def __contains__(self, file: str) -> bool:
+        return os.path.normpath(file) in self.entries
+
+    def record(self, file: str, doc_id: str) -> None:
+        """
+        Records the current contents of an indexed file.
+
+        Args:
+            file (str): file path
+            doc_id (str): document ID the file is indexed under
+        """
+        stat = os.stat(file)
+        self.entries[os.path.normpath(file)] = {
+            "doc_id": doc_id,
+            "hash": file_hash(file),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+        }
+
+    def remove(self, file: str) -> None:
+        self.entries.pop(os.path.normpath(file), None)
+
+    def is_current(self, file: str, doc_id: str) -> bool:
+        """
+        True if the file is recorded under doc_id and its contents did not change since.
+
+        Args:
+            file (str): file path
+            doc_id (str): document ID the file is expected under
+        """
+        entry = self.entries.get(os.path.normpath(file))
+        if entry is None or entry["doc_id"] != doc_id:
+            return False
+        stat = os.stat(file)
+        if stat.st_size != entry["size"]:
+            return False
+        if stat.st_mtime_ns == entry["mtime"]:
+            return True
+        # touched but possibly not edited
+        if file_hash(file) != entry["hash"]:
+            return False
+        entry["mtime"] = stat.st_mtime_ns
+        return True
@@ -0,0 +1,74 @@
+import mmap
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from typing import Dict, Iterator, Tuple
+from src.indexer.binary_index import Postings, read_directory, decode_postings
+
+
+class MappedIndex(Mapping):
+    def __init__(self, file_name: str) -> None:
+        """
+        Read-only, dict-like view of a binary index file (see binary_index.py).
+
+        The file is memory-mapped; only the sorted term list and an offset array
+        are kept in memory, and a term's postings are decoded on first access.
+
+        Args:
+            file_name (str): binary index file i.e. ./docs/inv-index.bin
+        """
+        self.file_name = file_name
+        with open(file_name, "rb") as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.positional, self.docs, self.terms, offsets = read_directory(self.buf, file_name)
+        self.offsets = array("Q", offsets)
+        self.cache: Dict[str, Postings] = {}
+
+    def _find(self, term: str) -> int:
+        """
+        Returns the position of term in the sorted term list, -1 if missing.
+        """
+        i = bisect_left(self.terms, term)
+        if i < len(self.terms) and self.terms[i] == term:
+            return i
+        return -1
+
+    def __getitem__(self, term: str) -> Postings:
+        postings = self.cache.get(term)
+        if postings is None:
+            i = self._find(term)
+            if i < 0:
+                raise KeyError(term)
+            postings = decode_postings(self.buf, self.offsets[i], self.positional, self.docs)
+            self.cache[term] = postings
+        return postings
+
+    def __contains__(self, term) -> bool:
+        return term in self.cache or self._find(term) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.terms)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def items(self) -> Iterator[Tuple[str, Postings]]:
+        """
+        Iterates over every term and its postings in term order without caching them.
+        """
+        for i, term in enumerate(self.terms):
+            postings = self.cache.get(term)
+            if postings is None:
+                postings = decode_postings(self.buf, self.offsets[i], self.positional, self.docs)
+            yield term, postings
+
+    def values(self) -> Iterator[Postings]:
+        """
+        Iterates over the postings of every term in term order without caching them.
+        """
+        for _, postings in self.items():
+            yield postings
+
+    def close(self) -> None:
+        self.cache.clear()
+        self.buf.close()
@@ -3,6 +3,7 @@ import json
 import logging
 from typing import List, Dict
 from src.logger import log_message
+from src.indexer.compact_index import CompactIndex
 
 class PositionalIndex:
     def __init__(self) -> None:
@@ -37,4 +38,10 @@ class PositionalIndex:
         if doc_id not in self.index[token]:
             self.index[token][doc_id] = []
         self.index[token][doc_id].append(position)
-        
\ No newline at end of file
+
+    def to_compact(self) -> CompactIndex:
+        """
+        Returns an array-backed, read-only copy of the index with the same dict-like read API.
+        Used by the memory benchmark only.
+        """
+        return CompactIndex(self.index, positional=True)
@@ -0,0 +1,154 @@
+import time
+import random
+from array import array
+from bisect import bisect_left
+from math import isqrt
+from typing import Dict, Iterable, Iterator, List
+
+# lists this many times longer than the other side are searched by galloping
+GALLOP_RATIO = 4
+
+
+class SkipPostings:
+    __slots__ = ("docs", "skip")
+
+    def __init__(self, docs: Iterable[int] = (), is_sorted: bool = False) -> None:
+        """
+        Postings list of sorted integer doc IDs with embedded skip pointers: every
+        skip-th entry points skip entries ahead (skip = sqrt(len)), so a merge can
+        jump over runs of smaller doc IDs without visiting them.
+
+        Args:
+            docs (Iterable[int]): doc IDs
+            is_sorted (bool): True if docs are already sorted and unique
+        """
+        self.docs = array("I", docs if is_sorted else sorted(set(docs)))
+        self.skip = max(1, isqrt(len(self.docs)))
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.docs)
+
+    def __contains__(self, doc: int) -> bool:
+        i = bisect_left(self.docs, doc)
+        return i < len(self.docs) and self.docs[i] == doc
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SkipPostings) and self.docs == other.docs
+
+    def __repr__(self) -> str:
+        return f"SkipPostings({list(self.docs)})"
+
+    def skip_to(self, i: int, target: int) -> int:
+        """
+        Follows skip pointers from i while they do not pass target and returns the new position.
+        """
+        docs, skip = self.docs, self.skip
+        n = len(docs)
+        while i % skip == 0 and i + skip < n and docs[i + skip] <= target:
+            i += skip
+        return i
+
+    def gallop(self, i: int, target: int) -> int:
+        """
+        Returns the first position at or after i whose doc ID is >= target, probing
+        i + 1, i + 2, i + 4, ... and then binary searching the last step (exponential search).
+        """
+        docs = self.docs
+        n = len(docs)
+        if i >= n or docs[i] >= target:
+            return i
+        step = 1
+        while i + step < n and docs[i + step] < target:
+            step *= 2
+        return bisect_left(docs, target, i + step // 2 + 1, min(i + step + 1, n))
+
+
+def intersect(p1: SkipPostings, p2: SkipPostings) -> SkipPostings:
+    """
+    Intersects two postings lists. When one list is much longer, each doc ID of the
+    short list is galloped to in the long one, so the cost grows with the short list
+    (times the log of the gap); otherwise both are merged using the skip pointers.
+    """
+    short, long = (p1, p2) if len(p1) <= len(p2) else (p2, p1)
+    if not short:
+        return SkipPostings()
+    result = array("I")
+    if len(long) >= GALLOP_RATIO * len(short):
+        docs = long.docs
+        j = 0
+        for doc in short.docs:
+            j = long.gallop(j, doc)
+            if j == len(docs):
+                break
+            if docs[j] == doc:
+                result.append(doc)
+        return SkipPostings(result, is_sorted=True)
+
+    a, b = short.docs, long.docs
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] == b[j]:
+            result.append(a[i])
+            i += 1
+            j += 1
+        elif a[i] < b[j]:
+            k = short.skip_to(i, b[j])
+            i = k if k != i else i + 1
+        else:
+            k = long.skip_to(j, a[i])
+            j = k if k != j else j + 1
+    return SkipPostings(result, is_sorted=True)
+
+
+def intersect_many(postings: List[SkipPostings]) -> SkipPostings:
+    """
+    Intersects postings lists smallest first, so every intermediate result is at
+    most as long as the rarest term's list.
+    """
+    if not postings:
+        return SkipPostings()
+    ordered = sorted(postings, key=len)
+    result = ordered[0]
+    for p in ordered[1:]:
+        if not result:
+            break
+        result = intersect(result, p)
+    return result
+
+
+def benchmark(long_length: int = 1_000_000, short_lengths: List[int] = [10, 100, 1000, 100_000], rounds: int = 5) -> List[Dict[str, float]]:
+    """
+    Times rare AND frequent intersections: Python set intersection (as BooleanModel.and_op did,
+    including building the sets) against intersect on SkipPostings.
+    """
+    universe = range(1, long_length * 4)
+    long = SkipPostings(random.sample(universe, long_length))
+    long_list = list(long.docs)
+    results = []
+    for short_length in short_lengths:
+        short = SkipPostings(random.sample(universe, short_length))
+        short_list = list(short.docs)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            expected = set(short_list).intersection(set(long_list))
+        set_time = (time.perf_counter() - start) / rounds
+        start = time.perf_counter()
+        for _ in range(rounds):
+            found = intersect(short, long)
+        skip_time = (time.perf_counter() - start) / rounds
+        assert set(found.docs) == expected
+        results.append({
+            "short": short_length,
+            "long": long_length,
+            "set_ms": round(set_time * 1000, 3),
+            "skip_ms": round(skip_time * 1000, 3),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    for row in benchmark():
+        print(row)
@@ -0,0 +1,159 @@
+import os
+import json
+import heapq
+import shutil
+from typing import Dict, Iterator, List, Tuple, Union
+from src.indexer.binary_index import BinaryIndexWriter
+
+# rough CPython costs used to estimate the size of the in-memory block
+TERM_BYTES = 250
+POSTING_BYTES = 180
+POSITION_BYTES = 36
+
+IndexWriter = Union[BinaryIndexWriter, "JsonIndexWriter"]
+
+
+class SPIMIIndexer:
+    def __init__(self, run_dir: str = "./docs/spimi", memory_budget: int = 64 * 1024 * 1024) -> None:
+        """
+        Single-pass in-memory indexing. Postings are collected in a block until the
+        estimated block size reaches memory_budget, then the block is sorted and
+        written to run_dir as a run. merge() combines the runs into the index files.
+
+        Args:
+            run_dir (str): directory for the intermediate runs
+            memory_budget (int): approximate block size in bytes
+        """
+        self.run_dir = run_dir
+        self.memory_budget = memory_budget
+        self.block: Dict[str, Dict[str, List[int]]] = {}
+        self.block_bytes = 0
+        self.runs: List[str] = []
+        shutil.rmtree(run_dir, ignore_errors=True)
+        os.makedirs(run_dir, exist_ok=True)
+
+    def add(self, doc_id: str, token: str, positions: List[int]) -> None:
+        """
+        Adds the positions of one term in one document to the block, flushing it when
+        the budget is reached.
+
+        Args:
+            doc_id (str): Document ID
+            token (str): index term
+            positions (List[int]): sorted positions of the term in the document
+        """
+        postings = self.block.get(token)
+        if postings is None:
+            postings = self.block[token] = {}
+            self.block_bytes += TERM_BYTES
+        doc_positions = postings.get(doc_id)
+        if doc_positions is None:
+            doc_positions = postings[doc_id] = []
+            self.block_bytes += POSTING_BYTES
+        doc_positions.extend(positions)
+        self.block_bytes += POSITION_BYTES * len(positions)
+        if self.block_bytes >= self.memory_budget:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Sorts the block by term and writes it as a run, one JSON line per term.
+        """
+        if not self.block:
+            return
+        run_file = os.path.join(self.run_dir, f"run-{len(self.runs):05d}.jsonl")
+        with open(run_file, "w", encoding="utf-8") as f:
+            for term in sorted(self.block):
+                f.write(json.dumps([term, self.block[term]]) + "\n")
+        self.runs.append(run_file)
+        self.block = {}
+        self.block_bytes = 0
+
+    def read_run(self, run: int) -> Iterator[Tuple[str, int, Dict[str, List[int]]]]:
+        """
+        Streams (term, run number, postings) from a run file.
+        """
+        with open(self.runs[run], "r", encoding="utf-8") as f:
+            for line in f:
+                term, postings = json.loads(line)
+                yield term, run, postings
+
+    def merge(self, writers: List[Tuple[IndexWriter, bool]]) -> int:
+        """
+        Flushes the last block and k-way merges all runs, passing every term's merged
+        postings to each writer. Only one term's postings are held in memory at a time.
+
+        Args:
+            writers (List[Tuple[IndexWriter, bool]]): (writer, positional) pairs, a writer
+                that is not positional receives term frequencies instead of positions
+
+        Returns:
+            int: number of runs merged
+        """
+        self.flush()
+        streams = [self.read_run(run) for run in range(len(self.runs))]
+        merged = heapq.merge(*streams, key=lambda entry: (entry[0], entry[1]))
+        term = None
+        postings: Dict[str, List[int]] = {}
+        for next_term, _, run_postings in merged:
+            if next_term != term:
+                if term is not None:
+                    write_term(term, postings, writers)
+                term, postings = next_term, {}
+            # runs are merged in order, so a document split over runs keeps ascending positions
+            for doc_id, positions in run_postings.items():
+                postings.setdefault(doc_id, []).extend(positions)
+        if term is not None:
+            write_term(term, postings, writers)
+        runs = len(self.runs)
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+        return runs
+
+
+def write_term(term: str, postings: Dict[str, List[int]], writers: List[Tuple[IndexWriter, bool]]) -> None:
+    """
+    Passes one term's merged postings to every writer, as term frequencies to the
+    writers that are not positional.
+    """
+    frequencies = None
+    for writer, positional in writers:
+        if positional:
+            writer.add_term(term, postings)
+        else:
+            if frequencies is None:
+                frequencies = {doc_id: len(positions) for doc_id, positions in postings.items()}
+            writer.add_term(term, frequencies)
+
+
+class JsonIndexWriter:
+    def __init__(self, file_name: str) -> None:
+        """
+        Streams an index to a JSON file (term -> doc_id -> tf or positions), one term
+        at a time, so it can be written next to the binary index during a merge.
+
+        Args:
+            file_name (str): output file i.e. ./docs/inv-index.json
+        """
+        self.file_name = file_name
+        self.file = open(file_name + ".tmp", "w", encoding="utf-8")
+        self.file.write("{")
+        self.separator = "\n"
+
+    def add_term(self, term: str, postings: Dict[str, Union[int, List[int]]]) -> None:
+        self.file.write(self.separator + json.dumps(term) + ": " + json.dumps(postings))
+        self.separator = ",\n"
+
+    def close(self) -> None:
+        self.file.write("\n}")
+        self.file.close()
+        os.replace(self.file_name + ".tmp", self.file_name)
+
+    def __enter__(self) -> "JsonIndexWriter":
+        return self
+
+    def __exit__(self, exc_type, *args) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+            os.remove(self.file_name + ".tmp")
@@ -97,8 +97,9 @@ class KMeansClustering:
         Reduce the dimensions of the vector space model using PCA.
         """
         pca = PCA(n_components=2)
+        # PCA centers the data, so the sparse matrix is densified first
         reduced_matrix = pca.fit_transform(
-            self.vector_space_model.normalized_tfidf_matrix
+            self.vector_space_model.normalized_tfidf_matrix.toarray()
         )
         return reduced_matrix
 
@@ -67,7 +67,8 @@ class KNNClassifier:
         self, data_dir: str, index_file: str
     ) -> VectorSpaceModel:
         iv = IndexProcessor(data_dir=data_dir)
-        iv.process_data()
+        if not iv.load_saved_indexes():
+            iv.process_data()
 
         with open(index_file, "r") as f:
             inverted_index = json.load(f)
@@ -90,9 +91,8 @@ class KNNClassifier:
         X, y = self._prepare_data()
         sss = StratifiedShuffleSplit(n_splits=2, test_size=0.25, random_state=42)
         for train_index, test_index in sss.split(X, y):
-            self.X_train, self.X_test = [X[i] for i in train_index], [
-                X[i] for i in test_index
-            ]
+            # X is a sparse matrix, rows are selected with index arrays
+            self.X_train, self.X_test = X[train_index], X[test_index]
             self.y_train, self.y_test = [y[i] for i in train_index], [
                 y[i] for i in test_index
             ]
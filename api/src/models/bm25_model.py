@@ -0,0 +1,140 @@
+import logging
+import numpy as np
+import scipy.sparse as sp
+from typing import Dict, List, Mapping, Tuple
+from src.processing.tokenizer import Tokenizer
+from src.processing.stem_cache import get_stemmer
+from src.indexer.document_store import DocumentStore
+from src.models.vector_space_model import build_document_term_matrix, indexed_documents
+from src.models.top_k import TopKScorer, batch_top_k
+from src.logger import get_logger, log_message
+from src.utils import time_logger
+
+
+class BM25Model:
+    def __init__(
+        self,
+        inverted_index: Mapping[str, Mapping[str, int]],
+        doc_store: DocumentStore,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> None:
+        """
+        Okapi BM25 ranking over the inverted index, one row per document in the index.
+        The document lengths come from the document store, filled in at ingestion; a
+        document without a record falls back to the sum of its term frequencies, which
+        is the same length. Each (document, term) weight is precomputed once:
+
+            idf(t) * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average_length))
+
+        with idf(t) = ln(1 + (N - df + 0.5) / (df + 0.5)). This is never negative, so the
+        weights work with the TopKScorer pruning.
+
+        Args:
+            inverted_index (Mapping): term -> doc_id -> tf
+            doc_store (DocumentStore): records holding each document's length in index terms
+            k1 (float): term frequency saturation
+            b (float): document length normalization, 0 (none) to 1 (full)
+        """
+        self.stemmer = get_stemmer()
+        self.logger = get_logger("bm25_model", see_time=True, console_log=False)
+        self.k1 = k1
+        self.b = b
+        self.document_ids: List[str] = indexed_documents(inverted_index)
+        self.term_columns: Dict[str, int] = {term: j for j, term in enumerate(inverted_index)}
+        matrix = build_document_term_matrix(inverted_index, self.document_ids)
+        indexed_lengths = np.asarray(matrix.sum(axis=1)).ravel()
+        lengths = np.array(
+            [doc_store.length(doc) or length for doc, length in zip(self.document_ids, indexed_lengths)], dtype=float
+        )
+        self.idf = self.calculate_idf(matrix)
+        self.weights = self.calculate_weights(matrix, lengths, lengths.mean() if len(lengths) else 0.0)
+        self.scorer = TopKScorer(self.weights)
+
+    def calculate_idf(self, matrix: sp.csr_matrix) -> np.ndarray:
+        """
+        Calculate the BM25 IDF of every column.
+
+        Args:
+            matrix (sp.csr_matrix): Document-Term Matrix.
+
+        Returns:
+            np.ndarray: IDF per column.
+        """
+        n_docs = matrix.shape[0]
+        df = matrix.getnnz(axis=0)
+        return np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+    @time_logger
+    def calculate_weights(self, matrix: sp.csr_matrix, lengths: np.ndarray, average_length: float) -> sp.csr_matrix:
+        """
+        Calculate the BM25 weight of every nonzero of the Document-Term Matrix.
+
+        Args:
+            matrix (sp.csr_matrix): Document-Term Matrix.
+            lengths (np.ndarray): length of each row's document.
+            average_length (float): average document length.
+
+        Returns:
+            sp.csr_matrix: BM25 weights, same sparsity pattern as matrix.
+        """
+        relative_lengths = lengths / average_length if average_length > 0 else np.ones_like(lengths)
+        norms = self.k1 * (1 - self.b + self.b * relative_lengths)
+        rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+        tf = matrix.data.astype(float)
+        data = self.idf[matrix.indices] * tf * (self.k1 + 1) / (tf + norms[rows])
+        return sp.csr_matrix((data, matrix.indices, matrix.indptr), shape=matrix.shape)
+
+    def query_weights(self, query: str) -> Dict[int, float]:
+        """
+        Maps a query to term column -> query term frequency. Terms that are not in the
+        index are skipped.
+        """
+        weights: Dict[int, float] = {}
+        for token in Tokenizer().tokenize(query):
+            term = self.stemmer.stem(token)
+            column = self.term_columns.get(term)
+            if column is None:
+                log_message(f"Term '{term}' not found in the inverted index.", logger=self.logger, level=logging.WARNING)
+                continue
+            weights[column] = weights.get(column, 0.0) + 1.0
+        return weights
+
+    @time_logger
+    def search(self, query: str, k: int = None, min_score: float = None) -> List[Tuple[str, float]]:
+        """
+        Search for documents based on the query.
+
+        Args:
+            query (str): Query string.
+            k (int): Number of documents to return, None for all matching documents.
+            min_score (float): Only documents scoring above it are returned.
+
+        Returns:
+            list: List of document IDs and their BM25 scores, best first.
+        """
+        ranks = self.scorer.top_k(self.query_weights(query), k=k, min_score=min_score)
+        return [(self.document_ids[row], score) for row, score in ranks]
+
+    @time_logger
+    def search_many(self, queries: List[str], k: int = None, min_score: float = None) -> List[List[Tuple[str, float]]]:
+        """
+        Search for many queries at once with one sparse query matrix and a single product.
+
+        Args:
+            queries (List[str]): Query strings.
+            k (int): Number of documents per query, None for all matching documents.
+            min_score (float): Only documents scoring above it are returned.
+
+        Returns:
+            list: Per query, the document IDs and their BM25 scores, best first.
+        """
+        rows, cols, data = [], [], []
+        for i, query in enumerate(queries):
+            for column, weight in self.query_weights(query).items():
+                rows.append(i)
+                cols.append(column)
+                data.append(weight)
+        query_matrix = sp.csr_matrix((data, (rows, cols)), shape=(len(queries), len(self.term_columns)))
+        ranks = batch_top_k(self.weights, query_matrix, k=k, min_score=min_score)
+        return [[(self.document_ids[row], score) for row, score in query_ranks] for query_ranks in ranks]
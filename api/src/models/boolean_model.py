@@ -1,22 +1,43 @@
-import re
 import json
-from typing import List, Dict
-from src.processing.porter_stemmer import PorterStemmer as Stemmer
+import logging
+from typing import Iterable, List, Dict, Tuple
+from src.processing.stem_cache import get_stemmer
 from src.processing.tokenizer import Tokenizer
+from src.indexer.skip_postings import SkipPostings, intersect_many
+from src.indexer.doc_bitmap import DocBitmap
+from src.indexer.binary_index import doc_name, doc_number
+from src.models.query_parser import QueryNode, PlanNode, QuerySyntaxError, parse_query, plan_query, explain_plan
 from src.utils import time_logger
 from src.logger import get_logger, log_message, CONSOLE_LOGS
-import os
+
+
+def name_order(doc_id: str) -> Tuple:
+    """
+    Sort key of a document ID: numeric names in numeric order, then the other names,
+    then the stable document number.
+    """
+    name = doc_name(doc_id)
+    return (0, int(name), "", doc_number(doc_id)) if name.isdigit() else (1, 0, name, doc_number(doc_id))
+
 
 class BooleanModel:
-    def __init__(self, inv_idx: Dict[str, Dict[str, List[int]]], all_docs_files: List[int]) -> None:
+    def __init__(self, inv_idx: Dict[str, Dict[str, List[int]]], doc_ids: Iterable[str]) -> None:
+        """
+        Boolean retrieval over the inverted index.
+
+        Args:
+            inv_idx (Dict): term -> doc_id -> tf
+            doc_ids (Iterable[str]): "N_name" IDs of every document in the collection
+        """
         self.inv_idx: Dict[str, Dict[str, List[int]]] = inv_idx
-        all_docs = []
-        for file in all_docs_files:
-            doc_id = re.findall(r'[^\\/]*$', file)
-            doc_id = doc_id[0].split(".")[0]
-            all_docs.append(doc_id)
-        self.all_docs = all_docs
-        self.stemmer = Stemmer()
+        # documents are numbered by ordinal (postings lists of ordinals, bitmaps over
+        # ordinals); ordinals follow the document names, so results come out sorted
+        self.doc_ids: List[str] = sorted(set(doc_ids), key=name_order)
+        self.doc_names: List[str] = [doc_name(doc_id) for doc_id in self.doc_ids]
+        self.ordinals: Dict[str, int] = {doc_id: i for i, doc_id in enumerate(self.doc_ids)}
+        self.postings_cache: Dict[str, SkipPostings] = {}
+        self.bitmap_cache: Dict[str, DocBitmap] = {}
+        self.stemmer = get_stemmer()
         self.tokenizer = Tokenizer()
         self.logger = get_logger("boolean_model", see_time=True, console_log=CONSOLE_LOGS)
         self.error_logger = get_logger("boolean_model_error", see_time=True, console_log=CONSOLE_LOGS)
@@ -24,166 +45,179 @@ class BooleanModel:
     @time_logger
     def search(self, query: str) -> List[str]:
         """
-        Main Process Query function that processes the query and returns the documents that satisfy the query
+        Main Process Query function that parses and plans the query and returns the documents that satisfy it
 
         Args:
-            query (str): user query of the form "word1 AND word2 OR word3 NOT word4"
+            query (str): user query such as "word1 AND (word2 OR word3) AND NOT word4"
 
         Returns:
             List[str]: documents that satisfy the query
         """
-        tokens: List[str] = self.tokenizer.tokenize(query, case_fold=False)
-        words: List[str] = [self.stemmer.stem(word.lower()) for word in tokens if word.upper() not in ['AND', 'OR', 'NOT']]
-        postings: Dict[str, List[int]] = self.get_postings(words)
-        if re.search(r'^(?!.*\b(?:OR|NOT)\b).*\bAND\b.*', query):
-            # sort posrings by assending order if only AND is present
-            postings = sorted(postings, key=lambda x: len(list(x.values())[0]), reverse=True)
-        if len(postings) == 0:
+        plan = self.plan(query)
+        if plan is None:
             return []
-        documents: List[int|str] = self.evaluate_query(postings, tokens)
-        documents: List[int] = [doc for doc in documents] if documents is not None else []
-        # sort documents
-        documents = sorted(documents, key=lambda x: int(x))
+        # ordinals follow the doc names, so the documents come out sorted
+        documents: List[str] = [self.doc_names[i] for i in self.execute(plan)]
         # log docs
         log_message(json.dumps({"query": query, "documents": documents}, indent=4), self.logger)
         return documents
 
-    
-    def evaluate_query(self, postings: List[Dict[str, List[int]]], query_tokens: List[str]) -> List[int]: 
+    def normalize(self, word: str) -> str:
+        """
+        Maps a query word to its index term, "" if the word is not indexable
+        """
+        token = self.tokenizer.preprocess(word, case_fold=False)
+        return self.stemmer.stem(token.lower()) if token else ""
+
+    def parse(self, query: str) -> QueryNode:
+        return parse_query(query, self.normalize)
+
+    def plan(self, query: str) -> PlanNode:
+        """
+        Parses the query and builds its execution plan, None if the query is invalid
+
+        Args:
+            query (str): user query
+
+        Returns:
+            PlanNode: plan whose operands are ordered by postings length
+        """
+        try:
+            tree = self.parse(query)
+        except QuerySyntaxError as e:
+            log_message(f"Invalid query: {e}", self.error_logger, logging.ERROR)
+            return None
+        return plan_query(tree, lambda term: len(self.term_postings(term)), len(self.doc_names))
+
+    def explain(self, query: str) -> str:
+        """
+        Returns the execution plan of the query as an indented tree
+        """
+        plan = self.plan(query)
+        return explain_plan(plan) if plan is not None else "Invalid query"
+
+    def execute(self, plan: PlanNode) -> DocBitmap:
         """
-        REcursively Evaluate the query using the postings list and the query tokens
+        Evaluates a plan step. ANDs of terms intersect the postings lists (galloping
+        from the rarest term), every other step combines document bitmaps, with NOT
+        left as a lazy complement.
 
         Args:
-            postings (List[Dict[str, List[int]]]): postings list for the words in the query
-            query_tokens (List[str]): all the tokens in the query
+            plan (PlanNode): plan step
 
         Returns:
-            List[int]: documents that satisfy the query (recursively evaluated)
-        """
-        
-        if len(postings) == 1:
-            if query_tokens[0] == 'NOT':
-                return self.not_op(list(postings[0].values())[0])
-            return list(postings[0].values())[0]
-        elif len(postings) == 2:
-            if query_tokens[0] == "NOT": 
-                return self.not_op(self.evaluate_query(postings[:1], query_tokens[1:]))
-            if query_tokens[1] == 'AND':
-                if query_tokens[0] == 'NOT':
-                    return self.and_not_op(list(postings[1].values())[0], list(postings[0].values())[0])
-                elif query_tokens[2] == 'NOT':
-                    return self.and_not_op(list(postings[0].values())[0], list(postings[1].values())[0])
-                return self.and_op(list(postings[0].values())[0], list(postings[1].values())[0])
-            elif query_tokens[1] == "OR":
-                if query_tokens[0] == 'NOT':
-                    return self.or_not_op(list(postings[1].values())[0], list(postings[0].values())[0])
-                elif query_tokens[2] == 'NOT':
-                    return self.or_not_op(list(postings[0].values())[0], list(postings[1].values())[0])
-                return self.or_op(list(postings[0].values())[0], list(postings[1].values())[0])
+            DocBitmap: documents that satisfy the step
+        """
+        if plan.op == "TERM":
+            return self.term_bitmap(plan.term)
+        if plan.op == "NOT":
+            return self.not_op(self.execute(plan.children[0]))
+        if plan.op == "OR":
+            result = self.execute(plan.children[0])
+            for child in plan.children[1:]:
+                result = self.or_op(result, self.execute(child))
+            return result
+        if all(child.op == "TERM" for child in plan.children):
+            result = self.to_bitmap(intersect_many([self.term_postings(child.term) for child in plan.children]))
         else:
-            #* recursively evaluate the query..!
-            if query_tokens[0] == 'NOT':
-                return self.not_op(self.evaluate_query([postings[0]], query_tokens[1:]))
-            if query_tokens[1] == 'AND':
-                if query_tokens[2] == 'NOT':
-                    return self.and_not_op(list(postings[0].values())[0], self.evaluate_query([postings[1], postings[2]], query_tokens[3:]))
-                return self.and_op(list(postings[0].values())[0], self.evaluate_query([postings[1], postings[2]], query_tokens[2:]))
-            elif query_tokens[1] == 'OR':
-                if query_tokens[2] == 'NOT':
-                    return self.or_not_op(list(postings[0].values())[0], self.evaluate_query([postings[1], postings[2]], query_tokens[3:]))
-                return self.or_op(list(postings[0].values())[0], self.evaluate_query([postings[1], postings[2]], query_tokens[2:]))
-            else:
-                log_message(f"Invalid query: {query_tokens}", self.error_logger, console_log=CONSOLE_LOGS)
-                self.error_logger.error(f"Invalid query: {query_tokens}")
-                return []
-                
-    def and_op(self, p1: List[int], p2: List[int]) -> List[int]:
+            result = self.execute(plan.children[0])
+            for child in plan.children[1:]:
+                result = self.and_op(result, self.execute(child))
+        for child in plan.excluded:
+            if not result:
+                break
+            result = self.and_not_op(result, self.execute(child))
+        return result
+
+    def and_op(self, p1: DocBitmap, p2: DocBitmap) -> DocBitmap:
         """
-        Perform AND operation on the two postings list
+        Perform AND operation on the two document sets
 
         Args:
-            p1 (List[int]): word1's postings list
-            p2 (List[int]): word2's postings list
+            p1 (DocBitmap): word1's documents
+            p2 (DocBitmap): word2's documents
 
         Returns:
-            List[int]: word1 AND word2's postings list
+            DocBitmap: word1 AND word2's documents
         """
-        p1 = set(p1)
-        p2 = set(p2)
-        return list(p1.intersection(p2))
+        return p1 & p2
     
-    def or_op(self, p1: List[int], p2: List[int]) -> List[int]:
+    def or_op(self, p1: DocBitmap, p2: DocBitmap) -> DocBitmap:
         """
-        Perform OR operation on the two postings list
+        Perform OR operation on the two document sets
 
         Args:
-            p1 (List[int]): word1's postings list
-            p2 (List[int]): word2's postings list
+            p1 (DocBitmap): word1's documents
+            p2 (DocBitmap): word2's documents
 
         Returns:
-            List[int]: word1 OR word2's postings list
+            DocBitmap: word1 OR word2's documents
         """
-        p1 = set(p1)
-        p2 = set(p2)
-        return list(p1.union(p2))
+        return p1 | p2
     
-    def not_op(self, p1: List[int]):
+    def not_op(self, p1: DocBitmap) -> DocBitmap:
         """
-        Perform NOT operation on the postings list
+        Perform NOT operation on the document set, the complement is lazy
 
         Args:
-            p1 (List[int]): word1's postings list
+            p1 (DocBitmap): word1's documents
 
         Returns:
-            _type_: word1's NOT postings list
+            DocBitmap: word1's NOT documents
         """
-        p1 = set(p1)
-        return list(set(self.all_docs).difference(p1))
-    
-    def and_not_op(self, p1: List[int], p2: List[int]) -> List[int]:
-        p1 = set(p1)
-        p2 = set(p2)
-        return list(p1.intersection(self.not_op(p2)))
-        # return list(p1.difference(p2))
+        return ~p1
     
-    def or_not_op(self, p1: List[int], p2: List[int]) -> List[int]:
-        p1 = set(p1)
-        p2 = set(p2)
-        return list(p1.union(self.not_op(p2)))
-        # return list(set(p1).union(set(self.all_docs).difference(p2)))
+    def and_not_op(self, p1: DocBitmap, p2: DocBitmap) -> DocBitmap:
+        return p1 - p2
     
+    def or_not_op(self, p1: DocBitmap, p2: DocBitmap) -> DocBitmap:
+        return p1 | ~p2
 
-    def get_postings(self, words: List[str]) -> Dict[str, List[int]]:
+    def to_bitmap(self, postings: SkipPostings) -> DocBitmap:
         """
-        Generate the postings list for the words in the query
+        Converts a postings list of ordinals to a bitmap over the collection
+        """
+        return DocBitmap.from_ordinals(postings, len(self.doc_ids))
+
+    def term_bitmap(self, word: str) -> DocBitmap:
+        """
+        Returns the document bitmap of an index term, built once and cached
+        """
+        bitmap = self.bitmap_cache.get(word)
+        if bitmap is None:
+            bitmap = self.bitmap_cache[word] = self.to_bitmap(self.term_postings(word))
+        return bitmap
+
+    def term_postings(self, word: str) -> SkipPostings:
+        """
+        Returns the postings list of an index term, built once and cached
 
         Args:
-            words (List[str]): words in the query
+            word (str): index term
 
         Returns:
-            Dict[str, List[int]]: word and its corresponding postings list
-        """
-        postings = []
-        for word in words:
-            try:
-                if word in self.inv_idx:
-                    docs = list(self.inv_idx[word].keys())
-                    # docs = [(doc.split('_')[1]) for doc in docs]
-                    docs = [doc.split('_')[1] for doc in docs]
-                    postings.append({word: docs})
-                else:
-                    postings.append({word: []})
-                    self.error_logger.error(f"Word '{word}' not found in inverted index")
-            except Exception as e:
-                self.error_logger.error(f"Error occurred while processing word '{word}': {str(e)}")
-                postings.append({word: []})
-        return postings
+            SkipPostings: sorted ordinals of the documents containing the term
+        """
+        docs = self.postings_cache.get(word)
+        if docs is not None:
+            return docs
+        try:
+            if word in self.inv_idx:
+                ordinals = self.ordinals
+                docs = SkipPostings(ordinals[doc] for doc in self.inv_idx[word].keys() if doc in ordinals)
+            else:
+                docs = SkipPostings()
+                self.error_logger.error(f"Word '{word}' not found in inverted index")
+        except Exception as e:
+            self.error_logger.error(f"Error occurred while processing word '{word}': {str(e)}")
+            return SkipPostings()
+        self.postings_cache[word] = docs
+        return docs
 
 if __name__=="__main__":
-    all_docs = os.listdir('../data/ResearchPapers')
     with open(f'../docs/inv-index.json', 'r') as f:    
         inv_idx = json.load(f)
-    bm = BooleanModel(inv_idx, all_docs=all_docs)
+    bm = BooleanModel(inv_idx, doc_ids={doc for postings in inv_idx.values() for doc in postings})
     queries = [
         "transformer AND NOT heart OR NOT artificial OR intelligence",
         "transformer",
@@ -191,8 +225,10 @@ if __name__=="__main__":
         "transformer AND NOT",
         "NOT artificial",
         "intelligence",
+        "(heart OR transformer) AND NOT (deep OR artificial)",
     ]
     
     for query in queries:
+        print(bm.explain(query))
         docs = bm.search(query)
         print(docs)
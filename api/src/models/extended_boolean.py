@@ -1,12 +1,79 @@
 import re
 import json
-from typing import List, Dict
-from src.processing.porter_stemmer import PorterStemmer as Stemmer
+import time
+import heapq
+import random
+from typing import List, Dict, Tuple
+from src.processing.stem_cache import get_stemmer
 from src.processing.tokenizer import Tokenizer
 from src.utils import time_logger
 from src.logger import get_logger, log_message, CONSOLE_LOGS
+from src.models.boolean_model import doc_name, name_order
 import os
 
+
+def proximity_windows(positions: List[List[int]], k: int) -> List[Tuple[int, int]]:
+    """
+    Finds the windows of at most k + 1 consecutive positions that contain every term,
+    in a single sliding-window pass over the merged position lists (O(P log m) for
+    P positions of m terms, instead of comparing every pair of positions).
+
+    Args:
+        positions (List[List[int]]): sorted positions of every query term in one document
+        k (int): maximum distance between the first and the last term of a window
+
+    Returns:
+        List[Tuple[int, int]]: (first, last) position of the tightest window ending at every
+        position where all terms are within k of each other
+    """
+    m = len(positions)
+    if m == 0 or any(len(p) == 0 for p in positions):
+        return []
+    merged = list(heapq.merge(*([(position, term) for position in p] for term, p in enumerate(positions))))
+    counts = [0] * m
+    covered = 0
+    left = 0
+    windows = []
+    for position, term in merged:
+        if counts[term] == 0:
+            covered += 1
+        counts[term] += 1
+        # drop positions that are too far behind, then the ones another occurrence makes redundant
+        while position - merged[left][0] > k or counts[merged[left][1]] > 1:
+            left_term = merged[left][1]
+            counts[left_term] -= 1
+            if counts[left_term] == 0:
+                covered -= 1
+            left += 1
+        if covered == m:
+            windows.append((merged[left][0], position))
+    return windows
+
+
+def nested_loop_proximity(pos_idx: Dict[str, Dict[str, List[int]]], terms: List[str], k: int) -> List[str]:
+    """
+    The former ExtendedBooleanModel.search loop (every position of a term compared with
+    every position kept for the previous ones), kept as the benchmark reference.
+    """
+    result = None
+    for term in terms:
+        if term in pos_idx:
+            current_positions = {doc: pos_idx[term][doc] for doc in pos_idx[term]}
+            if result is None:
+                result = current_positions
+            else:
+                new_result = {}
+                for doc in result:
+                    if doc in current_positions:
+                        for pos1 in result[doc]:
+                            for pos2 in current_positions[doc]:
+                                if abs(pos1 - pos2) <= k:
+                                    new_result.setdefault(doc, []).extend([pos1, pos2])
+                                    break
+                result = new_result
+    return list(result.keys()) if result is not None else []
+
+
 class ExtendedBooleanModel:
     def __init__(self, pos_idx: Dict[str, Dict[str, List[int]]], all_docs_files: List[str]) -> None:
         self.pos_idx: Dict[str, Dict[str, List[int]]] = pos_idx
@@ -16,53 +83,87 @@ class ExtendedBooleanModel:
             doc_id = doc_id[0].split(".")[0]
             all_docs.append(doc_id)
         self.all_docs = all_docs
-        self.stemmer = Stemmer()
+        self.stemmer = get_stemmer()
         self.tokenizer = Tokenizer()
         self.logger = get_logger("extended_boolean_model", see_time=True, console_log=CONSOLE_LOGS)
         self.error_logger = get_logger("extended_boolean_model_error", see_time=True, console_log=CONSOLE_LOGS)
 
     @time_logger
     def search(self, query: str) -> List[int]:
+        """
+        Proximity search: documents in which all query terms occur within k positions of each other
+
+        Args:
+            query (str): user query of the form "word1 word2 ... /k"
+
+        Returns:
+            List[int]: matching documents
+        """
+        windows = self.search_windows(query)
+        result = [doc_name(doc) for doc in sorted(windows, key=name_order)]
+        log_message(json.dumps({"query": query, "documents": result}, indent=4), self.logger)
+        return result
+
+    def search_windows(self, query: str) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        Returns the matching windows of a proximity query
+
+        Args:
+            query (str): user query of the form "word1 word2 ... /k"
+
+        Returns:
+            Dict[str, List[Tuple[int, int]]]: doc_id -> (first, last) position of every window holding all terms
+        """
         match = re.match(r'((?:\w+\s?)+) /(\d+)', query)
         if not match:
-            return []
-
-        words = match.group(1).split()
-        k_str = match.group(2)
-        k = int(k_str)
-        stemmed_terms = [self.stemmer.stem(word) for word in words]
-        result = None
-        for i, term in enumerate(stemmed_terms):
-            if term in self.pos_idx:
-                current_positions = {doc: self.pos_idx[term][doc] for doc in self.pos_idx[term]}
-                if result is None:
-                    result = current_positions
-                else:
-                    # Check if all positions are k tokens apart for all words in the query
-                    new_result = {}
-                    for doc in result:
-                        if doc in current_positions:
-                            positions1 = result[doc]
-                            positions2 = current_positions[doc]
-                            for pos1 in positions1:
-                                for pos2 in positions2:
-                                    if abs(pos1 - pos2) <= k:
-                                        if doc not in new_result:
-                                            new_result[doc] = []
-                                        new_result[doc].extend([pos1, pos2])
-                                        break
-
-                    result = new_result
-
-        if result is not None:
-            # Ensure that the positions are in ascending order
-            result = [doc.split('_')[1] for doc in list(result.keys())]
-            result = sorted(result, key=lambda x: int(x))
-            log_message(json.dumps({"query": query, "documents": result}, indent=4), self.logger)
-            return result
-
-        else:
-            return []
+            return {}
+
+        k = int(match.group(2))
+        terms = []
+        for word in match.group(1).split():
+            token = self.tokenizer.preprocess(word)
+            term = self.stemmer.stem(token.strip()) if token else ""
+            if term and term not in terms:
+                terms.append(term)
+        if not terms or any(term not in self.pos_idx for term in terms):
+            return {}
+
+        postings = sorted((self.pos_idx[term] for term in terms), key=len)
+        windows = {}
+        # only documents holding every term are scanned, starting from the rarest term
+        for doc in postings[0]:
+            if all(doc in p for p in postings[1:]):
+                found = proximity_windows([p[doc] for p in postings], k)
+                if found:
+                    windows[doc] = found
+        return windows
+
+
+def benchmark(num_docs: int = 20, doc_length: int = 20_000, frequencies: List[int] = [50, 500, 2000], k: int = 5) -> List[Dict[str, float]]:
+    """
+    Times two-term /k queries on synthetic documents with nested_loop_proximity against
+    the sliding-window merge, for terms of increasing frequency.
+    """
+    results = []
+    for frequency in frequencies:
+        pos_idx = {"a": {}, "b": {}}
+        for doc in range(num_docs):
+            for term in pos_idx:
+                pos_idx[term][f"{doc + 1}_{doc + 1}"] = sorted(random.sample(range(doc_length), frequency))
+        start = time.perf_counter()
+        expected = nested_loop_proximity(pos_idx, ["a", "b"], k)
+        nested_time = time.perf_counter() - start
+        start = time.perf_counter()
+        found = [doc for doc in pos_idx["a"] if proximity_windows([pos_idx["a"][doc], pos_idx["b"][doc]], k)]
+        window_time = time.perf_counter() - start
+        assert sorted(found) == sorted(expected)
+        results.append({
+            "positions_per_term": frequency,
+            "nested_ms": round(nested_time * 1000, 2),
+            "window_ms": round(window_time * 1000, 2),
+        })
+    return results
+
 
 if __name__ == "__main__":
     # ... (unchanged)
@@ -81,3 +182,5 @@ if __name__ == "__main__":
     for query in queries:
         result = ebm.search(query)
         print(f"Results for query '{query}': {result}")
+    for row in benchmark():
+        print(row)
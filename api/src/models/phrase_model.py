@@ -0,0 +1,126 @@
+import re
+import json
+from bisect import bisect_left
+from typing import List, Mapping, Sequence, Tuple
+from src.processing.stem_cache import get_stemmer
+from src.processing.tokenizer import Tokenizer
+from src.utils import time_logger
+from src.logger import get_logger, log_message, CONSOLE_LOGS
+from src.models.boolean_model import doc_name, name_order
+
+
+def contains(positions: List[int], position: int) -> bool:
+    i = bisect_left(positions, position)
+    return i < len(positions) and positions[i] == position
+
+
+def ordered_merge(postings: List[Mapping[str, List[int]]], offsets: Sequence[int]) -> List[str]:
+    """
+    Returns the documents where some start s has postings[i] at s + offsets[i] for every i.
+    Candidates come from the postings list with the fewest documents and are checked
+    against the others with binary searches.
+
+    Args:
+        postings (List[Mapping[str, List[int]]]): doc_id -> sorted positions, in phrase order
+        offsets (Sequence[int]): offset of each postings list in the phrase
+    """
+    rarest = min(range(len(postings)), key=lambda i: len(postings[i]))
+    docs = []
+    for doc, positions in postings[rarest].items():
+        others = [p.get(doc) for p in postings]
+        if any(o is None for o in others):
+            continue
+        for position in positions:
+            start = position - offsets[rarest]
+            if all(contains(others[i], start + offsets[i]) for i in range(len(others)) if i != rarest):
+                docs.append(doc)
+                break
+    return docs
+
+
+class PhraseModel:
+    def __init__(
+        self,
+        pos_idx: Mapping[str, Mapping[str, List[int]]],
+        bi_idx: Mapping[str, Mapping[str, List[int]]] = None,
+    ) -> None:
+        """
+        Exact phrase search. Each index term of the phrase must sit at its word offset
+        in the query, counted over every word as in the positional index, so a stop
+        word in the query stands for one word in the text.
+
+        Without a biword index the terms' positional postings are merged starting from
+        the rarest one. A biword index ("term next_term" -> doc_id -> position of term)
+        adds nothing but more selective lists to the same merge: for two terms at
+        adjacent offsets, the biword postings replace those of the first term. Both
+        paths return the same documents.
+
+        Args:
+            pos_idx (Mapping): positional index, term -> doc_id -> positions
+            bi_idx (Mapping): biword index built by IndexProcessor, optional
+        """
+        self.pos_idx = pos_idx
+        self.bi_idx = bi_idx
+        self.stemmer = get_stemmer()
+        self.tokenizer = Tokenizer()
+        self.logger = get_logger("phrase_model", see_time=True, console_log=CONSOLE_LOGS)
+
+    def terms(self, query: str) -> List[Tuple[int, str]]:
+        """
+        Returns the index terms of the (quoted) phrase with their word offsets, the
+        first term at offset 0.
+        """
+        terms = []
+        for i, word in enumerate(re.findall(self.tokenizer.get_pattern(), query)):
+            token = self.tokenizer.preprocess(word)
+            if token != "":
+                terms.append((i, self.stemmer.stem(token.strip())))
+        return [(i - terms[0][0], term) for i, term in terms]
+
+    @time_logger
+    def search(self, query: str) -> List[str]:
+        """
+        Returns the documents containing the phrase
+
+        Args:
+            query (str): phrase, e.g. '"heart failure prediction"'
+
+        Returns:
+            List[str]: matching documents
+        """
+        terms = self.terms(query)
+        if not terms:
+            return []
+        if len(terms) == 1:
+            docs = list(self.pos_idx.get(terms[0][1], {}))
+        elif self.bi_idx is not None:
+            docs = self.biword_search(terms)
+        else:
+            docs = self.positional_search(terms)
+        result = [doc_name(doc) for doc in sorted(docs, key=name_order)]
+        log_message(json.dumps({"query": query, "documents": result}, indent=4), self.logger)
+        return result
+
+    def biword_search(self, terms: List[Tuple[int, str]]) -> List[str]:
+        """
+        Matches a phrase of two or more terms with the biword postings of every pair of
+        terms at adjacent offsets in place of the first term's positional postings.
+        """
+        postings = []
+        for i, (offset, term) in enumerate(terms):
+            if i + 1 < len(terms) and terms[i + 1][0] == offset + 1:
+                postings.append(self.bi_idx.get(term + " " + terms[i + 1][1]))
+            else:
+                postings.append(self.pos_idx.get(term))
+        if any(p is None for p in postings):
+            return []
+        return ordered_merge(postings, [offset for offset, _ in terms])
+
+    def positional_search(self, terms: List[Tuple[int, str]]) -> List[str]:
+        """
+        Matches a phrase on the positional index: a term at offset o must be at position p + o.
+        """
+        postings = [self.pos_idx.get(term) for _, term in terms]
+        if any(p is None for p in postings):
+            return []
+        return ordered_merge(postings, [offset for offset, _ in terms])
@@ -0,0 +1,217 @@
+import re
+from typing import Callable, List, Optional
+
+OPERATORS = ("AND", "OR", "NOT")
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+class QueryNode:
+    def __init__(self, op: str, children: List["QueryNode"] = None, term: str = None) -> None:
+        """
+        Boolean query AST node.
+
+        Args:
+            op (str): "TERM", "NOT", "AND" or "OR"
+            children (List[QueryNode]): operands of NOT/AND/OR
+            term (str): normalized index term of a TERM node
+        """
+        self.op = op
+        self.children = children or []
+        self.term = term
+
+    def __repr__(self) -> str:
+        if self.op == "TERM":
+            return self.term
+        if self.op == "NOT":
+            return f"NOT {self.children[0]!r}"
+        return "(" + f" {self.op} ".join(repr(child) for child in self.children) + ")"
+
+
+class PlanNode:
+    def __init__(
+        self,
+        op: str,
+        estimate: int,
+        children: List["PlanNode"] = None,
+        excluded: List["PlanNode"] = None,
+        term: str = None,
+    ) -> None:
+        """
+        Execution plan step.
+
+        Args:
+            op (str): "TERM", "NOT" (complement), "AND", "AND_NOT" (AND of children minus excluded) or "OR"
+            estimate (int): estimated number of result documents
+            children (List[PlanNode]): operands, in execution order
+            excluded (List[PlanNode]): operands subtracted by AND_NOT, in execution order
+            term (str): index term of a TERM step
+        """
+        self.op = op
+        self.estimate = estimate
+        self.children = children or []
+        self.excluded = excluded or []
+        self.term = term
+
+
+def tokenize_query(query: str, normalize: Callable[[str], str]) -> List[str]:
+    """
+    Splits a query into "(", ")", operators and normalized terms. Words that
+    normalize to "" (e.g. numbers) are dropped.
+
+    Args:
+        query (str): user query
+        normalize (Callable[[str], str]): maps a query word to its index term
+    """
+    tokens = []
+    for word in re.findall(r"\(|\)|\b\w+\b", query):
+        if word in ("(", ")") or word in OPERATORS:
+            tokens.append(word)
+        else:
+            term = normalize(word)
+            if term:
+                tokens.append(term)
+    return tokens
+
+
+def parse_query(query: str, normalize: Callable[[str], str]) -> QueryNode:
+    """
+    Parses a boolean query with the precedence NOT > AND > OR and parentheses.
+    Terms next to each other without an operator are ANDed.
+
+        or_expr  := and_expr ("OR" and_expr)*
+        and_expr := not_expr (["AND"] not_expr)*
+        not_expr := "NOT" not_expr | "(" or_expr ")" | term
+
+    Args:
+        query (str): user query
+        normalize (Callable[[str], str]): maps a query word to its index term
+
+    Returns:
+        QueryNode: root of the AST
+
+    Raises:
+        QuerySyntaxError: on empty queries, dangling operators or unbalanced parentheses
+    """
+    tokens = tokenize_query(query, normalize)
+    position = 0
+
+    def peek() -> Optional[str]:
+        return tokens[position] if position < len(tokens) else None
+
+    def take() -> str:
+        nonlocal position
+        token = peek()
+        if token is None:
+            raise QuerySyntaxError(f"Unexpected end of query: {query}")
+        position += 1
+        return token
+
+    def or_expr() -> QueryNode:
+        children = [and_expr()]
+        while peek() == "OR":
+            take()
+            children.append(and_expr())
+        return combine("OR", children)
+
+    def and_expr() -> QueryNode:
+        children = [not_expr()]
+        while peek() not in (None, ")", "OR"):
+            if peek() == "AND":
+                take()
+            children.append(not_expr())
+        return combine("AND", children)
+
+    def not_expr() -> QueryNode:
+        token = take()
+        if token == "NOT":
+            return QueryNode("NOT", [not_expr()])
+        if token == "(":
+            node = or_expr()
+            if take() != ")":
+                raise QuerySyntaxError(f"Missing ')' in query: {query}")
+            return node
+        if token in OPERATORS or token == ")":
+            raise QuerySyntaxError(f"Unexpected '{token}' in query: {query}")
+        return QueryNode("TERM", term=token)
+
+    root = or_expr()
+    if peek() is not None:
+        raise QuerySyntaxError(f"Unexpected '{peek()}' in query: {query}")
+    return root
+
+
+def combine(op: str, children: List[QueryNode]) -> QueryNode:
+    """
+    Builds an AND/OR node, flattening nested nodes of the same operator.
+    """
+    if len(children) == 1:
+        return children[0]
+    flat = []
+    for child in children:
+        flat.extend(child.children if child.op == op else [child])
+    return QueryNode(op, flat)
+
+
+def plan_query(node: QueryNode, postings_length: Callable[[str], int], num_docs: int) -> PlanNode:
+    """
+    Turns an AST into an execution plan:
+        - double negations cancel,
+        - NOT operands of an AND become AND_NOT differences (no complement is built),
+        - an AND of NOTs only becomes NOT (a OR b OR ...),
+        - AND operands run from the smallest estimated result up,
+          OR operands from the smallest, excluded operands from the largest.
+
+    Args:
+        node (QueryNode): AST root
+        postings_length (Callable[[str], int]): number of documents containing a term
+        num_docs (int): number of documents in the collection
+
+    Returns:
+        PlanNode: root of the plan
+    """
+    if node.op == "TERM":
+        return PlanNode("TERM", postings_length(node.term), term=node.term)
+    if node.op == "NOT":
+        child = node.children[0]
+        if child.op == "NOT":
+            return plan_query(child.children[0], postings_length, num_docs)
+        planned = plan_query(child, postings_length, num_docs)
+        return PlanNode("NOT", max(0, num_docs - planned.estimate), [planned])
+    if node.op == "OR":
+        children = sorted((plan_query(child, postings_length, num_docs) for child in node.children), key=lambda p: p.estimate)
+        return PlanNode("OR", min(num_docs, sum(child.estimate for child in children)), children)
+
+    positives, negatives = [], []
+    for child in node.children:
+        planned = plan_query(child, postings_length, num_docs)
+        if planned.op == "NOT":
+            negatives.append(planned.children[0])
+        else:
+            positives.append(planned)
+    positives.sort(key=lambda p: p.estimate)
+    negatives.sort(key=lambda p: p.estimate, reverse=True)
+    if not positives:
+        union = PlanNode("OR", min(num_docs, sum(n.estimate for n in negatives)), negatives[::-1]) if len(negatives) > 1 else negatives[0]
+        return PlanNode("NOT", max(0, num_docs - union.estimate), [union])
+    estimate = positives[0].estimate
+    if not negatives:
+        return PlanNode("AND", estimate, positives)
+    return PlanNode("AND_NOT", estimate, positives, negatives)
+
+
+def explain_plan(plan: PlanNode, indent: int = 0) -> str:
+    """
+    Renders a plan as an indented tree, one step per line with its estimated result size.
+    """
+    pad = "  " * indent
+    if plan.op == "TERM":
+        return f"{pad}TERM {plan.term} (docs={plan.estimate})"
+    lines = [f"{pad}{plan.op} (est={plan.estimate})"]
+    lines.extend(explain_plan(child, indent + 1) for child in plan.children)
+    if plan.excluded:
+        lines.append(f"{pad}  MINUS")
+        lines.extend(explain_plan(child, indent + 2) for child in plan.excluded)
+    return "\n".join(lines)
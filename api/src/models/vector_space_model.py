@@ -2,13 +2,150 @@ import json
 import math
 import os
 import re
+import time
+import hashlib
+import random
 import logging
 import numpy as np
-from typing import Dict, List, Tuple
+import scipy.sparse as sp
+from typing import Dict, List, Mapping, Tuple, Union
 from src.processing.tokenizer import Tokenizer
-from src.processing.porter_stemmer import PorterStemmer
+from src.processing.stem_cache import get_stemmer
 from src.logger import get_logger, log_message, CONSOLE_LOGS
 from src.utils import time_logger
+from src.indexer.mapped_index import MappedIndex
+from src.indexer.binary_index import doc_name, doc_number, index_digest
+from src.models.top_k import TopKScorer, batch_top_k
+
+# float32 CSR arrays (.npy, memory-mapped on load) plus meta.json, which holds the
+# fingerprint of the index the matrices were built from, the row order and the vocabulary
+MATRIX_CACHE_DIR = './docs/vsm-cache'
+CACHE_META_FILE = os.path.join(MATRIX_CACHE_DIR, 'meta.json')
+SAVED_MATRICES = ['document_term', 'tfidf', 'normalized_tfidf']
+
+
+def index_fingerprint(inverted_index: Mapping[str, Mapping[str, int]]) -> str:
+    """
+    Returns the sha256 of the index in the binary format. A MappedIndex is hashed as
+    it is mapped, so no postings are decoded; a dict index is encoded in memory, so both
+    have the same fingerprint for the same data.
+    """
+    if isinstance(inverted_index, MappedIndex):
+        return hashlib.sha256(inverted_index.buf).hexdigest()
+    return index_digest(inverted_index, positional=False)
+
+
+def indexed_documents(inverted_index: Mapping[str, Mapping[str, int]]) -> List[str]:
+    """
+    Returns the names of the documents that have postings in the index, by document
+    number. A MappedIndex lists them in its doc table, so no postings are decoded.
+    """
+    if isinstance(inverted_index, MappedIndex):
+        doc_ids = inverted_index.docs.values()
+    else:
+        doc_ids = {doc_id for postings in inverted_index.values() for doc_id in postings}
+    return list(dict.fromkeys(doc_name(doc_id) for doc_id in sorted(doc_ids, key=doc_number)))
+
+
+def save_sparse(matrix: sp.spmatrix, prefix: str) -> None:
+    """
+    Saves the arrays of a CSR/CSC matrix as prefix-{data,indices,indptr}.npy, data as float32.
+    """
+    np.save(prefix + '-data.npy', matrix.data.astype(np.float32))
+    np.save(prefix + '-indices.npy', matrix.indices)
+    np.save(prefix + '-indptr.npy', matrix.indptr)
+
+
+def load_sparse(prefix: str, shape: Tuple[int, int], matrix_type=sp.csr_matrix) -> sp.spmatrix:
+    """
+    Opens a matrix saved by save_sparse without reading it: the arrays are read-only
+    memory maps, paged in as they are used.
+    """
+    arrays = (np.load(prefix + suffix, mmap_mode='r') for suffix in ('-data.npy', '-indices.npy', '-indptr.npy'))
+    return matrix_type(tuple(arrays), shape=shape, copy=False)
+
+
+def build_document_term_matrix(inverted_index: Mapping[str, Mapping[str, int]], document_ids: List[str]) -> sp.csr_matrix:
+    """
+    Builds the sparse Document-Term Matrix in one pass over the postings: column j holds
+    the postings of the j-th term, rows follow document_ids. The coordinate arrays are
+    assembled with NumPy, so the cost grows with the number of postings, not docs x terms.
+
+    Args:
+        inverted_index (Mapping[str, Mapping[str, int]]): term -> doc_id ("N_name") -> tf
+        document_ids (List[str]): document names in row order
+
+    Returns:
+        sp.csr_matrix: term frequencies, documents x terms
+    """
+    lengths = np.zeros(len(inverted_index), dtype=np.int64)
+    doc_ids, tfs = [], []
+    for j, postings in enumerate(inverted_index.values()):
+        lengths[j] = len(postings)
+        doc_ids.extend(postings.keys())
+        tfs.extend(postings.values())
+    shape = (len(document_ids), len(inverted_index))
+    if not doc_ids:
+        return sp.csr_matrix(shape, dtype=int)
+
+    # each distinct doc_id is mapped to its row once, then looked up per posting
+    row_of = {doc: i for i, doc in enumerate(document_ids)}
+    id_rows = {doc: row_of[doc_name(doc)] for doc in set(doc_ids)}
+    rows = np.fromiter(map(id_rows.__getitem__, doc_ids), dtype=np.int64, count=len(doc_ids))
+    cols = np.repeat(np.arange(len(inverted_index)), lengths)
+    data = np.array(tfs, dtype=int)
+    return sp.coo_matrix((data, (rows, cols)), shape=shape).tocsr()
+
+
+def nested_loop_matrix(documents: Dict[str, Dict[str, int]], document_ids: List[str], terms: List[str]) -> sp.csr_matrix:
+    """
+    Reference Document-Term Matrix built cell by cell over every (document, term) pair,
+    as VectorSpaceModel.create_document_term_matrix did; kept for the benchmark.
+    """
+    rows, cols, data = [], [], []
+    for i, doc in enumerate(document_ids):
+        for j, term in enumerate(terms):
+            if term in documents[doc]:
+                rows.append(i)
+                cols.append(j)
+                data.append(documents[doc][term])
+    return sp.csr_matrix((data, (rows, cols)), shape=(len(document_ids), len(terms)), dtype=int)
+
+
+def benchmark(num_docs: int = 10_000, vocab_size: int = 20_000, terms_per_doc: int = 100, sample: int = 200) -> Dict[str, float]:
+    """
+    Times build_document_term_matrix on a synthetic index against the nested loop. The
+    loop is O(docs x terms), so it is timed on the first sample documents and scaled up.
+    """
+    terms = [f"term{j:06d}" for j in range(vocab_size)]
+    inverted_index = {term: {} for term in terms}
+    for doc in range(1, num_docs + 1):
+        for term in random.sample(terms, terms_per_doc):
+            inverted_index[term][f"{doc}_{doc}"] = random.randint(1, 10)
+    document_ids = [str(doc) for doc in range(1, num_docs + 1)]
+
+    start = time.perf_counter()
+    matrix = build_document_term_matrix(inverted_index, document_ids)
+    vectorized_time = time.perf_counter() - start
+
+    documents = {doc: {} for doc in document_ids[:sample]}
+    for term, postings in inverted_index.items():
+        for doc_id, tf in postings.items():
+            doc = doc_name(doc_id)
+            if doc in documents:
+                documents[doc][term] = tf
+    start = time.perf_counter()
+    expected = nested_loop_matrix(documents, document_ids[:sample], terms)
+    loop_time = (time.perf_counter() - start) * num_docs / sample
+    assert (matrix[:sample] != expected).nnz == 0
+    return {
+        "docs": num_docs,
+        "terms": vocab_size,
+        "postings": int(matrix.nnz),
+        "vectorized_ms": round(vectorized_time * 1000, 3),
+        "loop_ms_estimated": round(loop_time * 1000, 3),
+    }
+
 
 class VectorSpaceModel:
     def __init__(self, inverted_index: Dict[str, Dict[str, int]], alpha: float = 0.025):
@@ -19,108 +156,115 @@ class VectorSpaceModel:
             inverted_index (dict): A dictionary representing the inverted index.
             load_from_files (bool): Whether to load pre-computed TF-IDF data from files if available.
         """
-        self.stemmer = PorterStemmer()
+        self.stemmer = get_stemmer()
         self.logger = get_logger("vector_model", see_time=True, console_log=False)
         self.alpha = alpha
         
         self.inverted_index = inverted_index
         self.inverted_index = self.sort_index(self.inverted_index)
-        self.documents = self._parse_inverted_index()
-        self.document_ids = list(self.documents.keys())
-        print(self.document_ids)
+        self.fingerprint = index_fingerprint(self.inverted_index)
+        # startup only reads the cache; it is written when the index changed
         self.document_term_matrix, self.tfidf_matrix, self.normalized_tfidf_matrix = self.load_saved_matrices()
-        self.save_to_files()
+        # the scorer walks the postings (columns) of the normalized matrix
+        self.scorer = TopKScorer(load_sparse(os.path.join(MATRIX_CACHE_DIR, 'normalized_tfidf_columns'), self.normalized_tfidf_matrix.shape, sp.csc_matrix))
         
     def sort_index(self, index):
+        if isinstance(index, MappedIndex):
+            # binary index terms are already stored in sorted order
+            return index
         return {k: v for k, v in sorted(index.items(), key=lambda item: item[0], reverse=False)}
             
-    def _parse_inverted_index(self) -> Dict[str, Dict[str, int]]:
+    def load_saved_matrices(self):
         """
-        Parse the inverted index into a usable format.
+        Load the cached sparse matrices if they were built from the current index (same
+        fingerprint), otherwise rebuild them and rewrite the cache. The matrices are
+        float32 and memory-mapped read-only. The row order and the term -> column and
+        term -> idf dictionaries come from the cache as well. On a miss the rows follow
+        the documents of the index by document number.
 
         Returns:
-            dict: A dictionary containing documents and their respective term frequencies.
+            Tuple: Document-Term Matrix, TF-IDF Matrix, Normalized TF-IDF Matrix.
         """
-        documents = {}
-        for category, index in self.inverted_index.items():
-            for doc_id, tf in index.items():
-                doc_id_parts = doc_id.split('_')
-                doc = doc_id_parts[1]
-                if doc not in documents:
-                    documents[doc] = {}
-                documents[doc][category] = tf
-
-        return documents
+        meta = None
+        if os.path.exists(CACHE_META_FILE):
+            with open(CACHE_META_FILE, 'r') as f:
+                meta = json.load(f)
+        if meta is not None and meta['fingerprint'] == self.fingerprint:
+            self.document_ids = meta['document_ids']
+            self.term_columns, self.idf = meta['columns'], meta['idf']
+            shape = tuple(meta['shape'])
+            return tuple(load_sparse(os.path.join(MATRIX_CACHE_DIR, name), shape) for name in SAVED_MATRICES)
+
+        log_message('Matrix cache is missing or stale, rebuilding it from the index.', logger=self.logger, level=logging.WARNING)
+        self.document_ids = indexed_documents(self.inverted_index)
+        self.document_term_matrix, self.tfidf_matrix, self.normalized_tfidf_matrix = self.generate_vector_space_model()
+        terms = list(self.inverted_index.keys())
+        self.term_columns = {term: j for j, term in enumerate(terms)}
+        self.idf = dict(zip(terms, self.calculate_idf(self.document_term_matrix).tolist()))
+        self.save_to_files()
+        return self.load_saved_matrices()
 
-    def load_saved_matrices(self):
+    @time_logger
+    def create_document_term_matrix(self) -> sp.csr_matrix:
         """
-        Load pre-computed matrices from files if available.
+        Create a sparse Document-Term Matrix, only the nonzero term frequencies are stored.
 
         Returns:
-            Tuple: Document-Term Matrix, TF-IDF Matrix, Normalized TF-IDF Matrix.
+            sp.csr_matrix: A matrix where rows represent documents and columns represent terms.
         """
-        if os.path.exists('./docs/document_term_matrix.npy') and os.path.exists('./docs/tfidf_matrix.npy') and os.path.exists('./docs/normalized_tfidf_matrix.npy'):
-            document_term_matrix = np.load('./docs/document_term_matrix.npy')
-            tfidf_matrix = np.load('./docs/tfidf_matrix.npy')
-            normalized_tfidf_matrix = np.load('./docs/normalized_tfidf_matrix.npy')
-            return document_term_matrix, tfidf_matrix, normalized_tfidf_matrix
-        else:
-            log_message('Could not load pre-computed matrices from files.', logger=self.logger, level=logging.WARNING)
-            return self.generate_vector_space_model()
-        
+        return build_document_term_matrix(self.inverted_index, self.document_ids)
 
-    def create_document_term_matrix(self) -> np.ndarray:
+    @time_logger
+    def calculate_tf_idf(self, matrix: sp.csr_matrix) -> sp.csr_matrix:
         """
-        Create a Document-Term Matrix.
+        Calculate TF-IDF Weights.
+
+        Args:
+            matrix (sp.csr_matrix): Document-Term Matrix.
 
         Returns:
-            np.ndarray: A matrix where rows represent documents and columns represent terms.
+            sp.csr_matrix: TF-IDF Matrix.
         """
-        matrix = np.zeros((len(self.document_ids), len(self.inverted_index)), dtype=int)
-        for i, doc in enumerate(self.document_ids):
-            for j, term in enumerate(self.inverted_index):
-                if term in self.documents[doc]:
-                    matrix[i, j] = self.documents[doc][term]
-        return matrix
+        idf = self.calculate_idf(matrix)
 
-    @time_logger
-    def calculate_tf_idf(self, matrix: np.ndarray) -> np.ndarray:
+        # Calculate TF-IDF, scaling each column by its idf keeps the sparsity pattern
+        tfidf_matrix = matrix.astype(float) @ sp.diags(idf)
+        return tfidf_matrix.tocsr()
+
+    def calculate_idf(self, matrix: sp.csr_matrix) -> np.ndarray:
         """
-        Calculate TF-IDF Weights.
+        Calculate the IDF of every column, log10(N / df), 0 for terms in no document.
 
         Args:
-            matrix (np.ndarray): Document-Term Matrix.
+            matrix (sp.csr_matrix): Document-Term Matrix.
 
         Returns:
-            np.ndarray: TF-IDF Matrix.
+            np.ndarray: IDF per column.
         """
         n_docs = matrix.shape[0]
-        n_terms = matrix.shape[1]
-        
-        # Calculate DF & IDF
-        df = np.sum(matrix > 0, axis=0)
-        idf = np.where(df > 0, np.log10(n_docs / df), 0)
-
-        # Calculate TF-IDF
-        tfidf_matrix = matrix * idf
-        return tfidf_matrix
+        df = matrix.getnnz(axis=0)
+        idf = np.zeros(matrix.shape[1])
+        np.log10(n_docs / df, out=idf, where=df > 0)
+        return idf
 
     @time_logger
-    def normalize_vectors(self, matrix: np.ndarray) -> np.ndarray:
+    def normalize_vectors(self, matrix: sp.csr_matrix) -> sp.csr_matrix:
         """
         Normalize Vectors to unit length.
 
         Args:
-            matrix (np.ndarray): Matrix to be normalized.
+            matrix (sp.csr_matrix): Matrix to be normalized.
 
         Returns:
-            np.ndarray: Normalized matrix.
+            sp.csr_matrix: Normalized matrix, all-zero rows stay zero.
         """
-        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
-        return matrix / norms
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        inverse = np.zeros_like(norms)
+        np.divide(1.0, norms, out=inverse, where=norms > 0)
+        return (sp.diags(inverse) @ matrix).tocsr()
 
     @time_logger
-    def generate_vector_space_model(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    def generate_vector_space_model(self) -> Tuple[sp.csr_matrix, sp.csr_matrix, sp.csr_matrix]:
         """
         Generate Vector Space Model.
 
@@ -139,11 +283,37 @@ class VectorSpaceModel:
         return matrix, tfidf_matrix, normalized_matrix
 
     def save_to_files(self):
-        np.save('./docs/document_term_matrix.npy', self.document_term_matrix)
-        np.save('./docs/tfidf_matrix.npy', self.tfidf_matrix)
-        np.save('./docs/normalized_tfidf_matrix.npy', self.normalized_tfidf_matrix)
-        with open("./docs/documents.json", "w") as f:
-            tfidf_vector = {doc_id: list(doc_vector) for doc_id, doc_vector in zip(self.document_ids, self.normalized_tfidf_matrix)}
+        """
+        Writes the matrix cache for the current index. meta.json is removed first and
+        written last, so an interrupted write leaves no cache rather than a mismatched one.
+        """
+        os.makedirs(MATRIX_CACHE_DIR, exist_ok=True)
+        if os.path.exists(CACHE_META_FILE):
+            os.remove(CACHE_META_FILE)
+        matrices = (self.document_term_matrix, self.tfidf_matrix, self.normalized_tfidf_matrix)
+        for name, matrix in zip(SAVED_MATRICES, matrices):
+            save_sparse(matrix, os.path.join(MATRIX_CACHE_DIR, name))
+        save_sparse(self.normalized_tfidf_matrix.tocsc(), os.path.join(MATRIX_CACHE_DIR, 'normalized_tfidf_columns'))
+        meta = {
+            'fingerprint': self.fingerprint,
+            'shape': list(self.normalized_tfidf_matrix.shape),
+            'document_ids': self.document_ids,
+            'columns': self.term_columns,
+            'idf': self.idf,
+        }
+        with open(CACHE_META_FILE, 'w') as f:
+            json.dump(meta, f)
+
+    def export_documents(self, file_name: str = "./docs/documents.json") -> None:
+        """
+        Writes the nonzero normalized TF-IDF weights of every document, keyed by term.
+        """
+        terms = list(self.term_columns)
+        with open(file_name, "w") as f:
+            tfidf_vector = {}
+            for i, doc_id in enumerate(self.document_ids):
+                row = self.normalized_tfidf_matrix.getrow(i)
+                tfidf_vector[doc_id] = {terms[j]: float(w) for j, w in zip(row.indices, row.data)}
             json.dump(tfidf_vector, f, indent=4)
 
     def get_document_vector(self, doc_id: str) -> np.ndarray:
@@ -157,18 +327,32 @@ class VectorSpaceModel:
             np.ndarray: Vector representation of the document.
         """
         index = self.document_ids.index(doc_id)
-        return self.normalized_tfidf_matrix[index]
+        return self.normalized_tfidf_matrix.getrow(index).toarray().ravel()
     
     @time_logger
-    def generate_query_vector(self, query: str) -> np.ndarray:
+    def generate_query_vector(self, query: str, sparse: bool = False) -> Union[np.ndarray, sp.csr_matrix]:
         """
-        Generate a query vector for a given query.
+        Generate a query vector of term frequencies for a given query.
 
         Args:
             query (str): Query string.
+            sparse (bool): Return a 1 x terms CSR row instead of a dense vector.
 
         Returns:
-            np.ndarray: Query vector.
+            np.ndarray | sp.csr_matrix: Query vector, None if a term is not in the index.
+        """
+        columns = self.query_columns(query)
+        if columns is None:
+            return None
+        if sparse:
+            # repeated terms are summed when the coordinates are converted to CSR
+            return sp.csr_matrix((np.ones(len(columns)), ([0] * len(columns), columns)), shape=(1, len(self.term_columns)))
+        return np.bincount(columns, minlength=len(self.term_columns)).astype(float)
+    
+    def query_columns(self, query: str) -> List[int]:
+        """
+        Returns the matrix column of every query term (repeated terms repeat), None if a
+        term is not in the index.
         """
         tokens = Tokenizer().tokenize(query)
         # sort tokens 
@@ -176,69 +360,106 @@ class VectorSpaceModel:
         
         stemmed_tokens = [self.stemmer.stem(token) for token in tokens]
         
-        query_vector = np.zeros(len(self.inverted_index))
+        columns = []
         for term in stemmed_tokens:
-            if term in self.inverted_index:
-                index = list(self.inverted_index.keys()).index(term)
-                query_vector[index] += 1
-            else:
+            column = self.term_columns.get(term)
+            if column is None:
                 log_message(f"Term '{term}' not found in the inverted index.", logger=self.logger, level=logging.WARNING)
                 return None
-        return query_vector
-    
-    def generate_normalized_query_vector(self, query: str) -> np.ndarray:
+            columns.append(column)
+        return columns
+
+    def generate_normalized_query_vector(self, query: str, sparse: bool = False) -> Union[np.ndarray, sp.csr_matrix]:
         """
-        Generate a query vector for a given query.
+        Generate a unit length query vector for a given query.
 
         Args:
             query (str): Query string.
+            sparse (bool): Return a 1 x terms CSR row instead of a dense vector.
 
         Returns:
-            np.ndarray: Query vector.
+            np.ndarray | sp.csr_matrix: Query vector, None if a term is not in the index.
         """
-        query_vector = self.generate_query_vector(query)
-        if query_vector is None:
+        query_vector = self.generate_query_vector(query, sparse=sparse)
+        if query_vector is None or query_vector.sum() == 0:
             return None
+        if sparse:
+            return query_vector / np.sqrt(query_vector.multiply(query_vector).sum())
         query_vector = query_vector / np.linalg.norm(query_vector)
         return query_vector
     
     @time_logger
-    def rank_documents(self, query: str) -> List[Tuple[str, float]]:
+    def rank_documents(self, query: str, k: int = None, min_score: float = None) -> List[Tuple[str, float]]:
         """
-        Rank documents based on the query.
+        Rank documents based on the query. Only the postings of the query terms are
+        scored, and with k or min_score the scorer stops early once the rest of the
+        collection cannot make it into the result.
 
         Args:
             query (str): Query string.
+            k (int): Number of documents to return, None for every document that matches a query term.
+            min_score (float): Only documents scoring above it are returned.
 
         Returns:
-            list: List of document IDs and their respective cosine similarity scores.
-        """
-        normalized_query_vector = self.generate_normalized_query_vector(query)
-        scores = []
-        for doc_id in self.document_ids:
-            doc_vector = self.get_document_vector(doc_id)
-            score = np.dot(normalized_query_vector, doc_vector)
-            scores.append((doc_id, score))
-            
-        return sorted(scores, key=lambda x: x[1], reverse=True)
+            list: List of document IDs and their respective cosine similarity scores, best first.
+        """
+        normalized_query_vector = self.generate_normalized_query_vector(query, sparse=True)
+        if normalized_query_vector is None:
+            return None
+        query_weights = dict(zip(normalized_query_vector.indices.tolist(), normalized_query_vector.data.tolist()))
+        ranks = self.scorer.top_k(query_weights, k=k, min_score=min_score)
+        return [(self.document_ids[row], score) for row, score in ranks]
 
-    def search(self, query: str) -> List[str]:
+    def search(self, query: str, k: int = None, min_score: float = None) -> List[Tuple[str, float]]:
         """
         Search for documents based on the query.
 
         Args:
             query (str): Query string.
+            k (int): Number of documents to return, None for all matching documents.
+            min_score (float): Only documents scoring above it are returned.
 
         Returns:
-            list: List of document IDs.
+            list: List of document IDs and their scores, best first.
         """
-        ranks = self.rank_documents(query)
+        ranks = self.rank_documents(query, k=k, min_score=min_score)
         if ranks is None:
             return []
 
         return ranks
 
-# if __name__ == "__main__":
+    @time_logger
+    def search_many(self, queries: List[str], k: int = None, min_score: float = None) -> List[List[Tuple[str, float]]]:
+        """
+        Search for many queries at once: the normalized query vectors are stacked into
+        one sparse query matrix and scored against every document in a single product.
+
+        Args:
+            queries (List[str]): Query strings.
+            k (int): Number of documents per query, None for all matching documents.
+            min_score (float): Only documents scoring above it are returned.
+
+        Returns:
+            list: Per query, the document IDs and their scores, best first. Queries with a
+            term that is not in the index get no documents, as in search.
+        """
+        rows, cols, data = [], [], []
+        for i, query in enumerate(queries):
+            columns = self.query_columns(query)
+            if not columns:
+                continue
+            counts = np.bincount(columns)
+            terms = np.flatnonzero(counts)
+            rows.extend([i] * len(terms))
+            cols.extend(terms.tolist())
+            data.extend((counts[terms] / np.linalg.norm(counts)).tolist())
+        query_matrix = sp.csr_matrix((data, (rows, cols)), shape=(len(queries), len(self.term_columns)))
+        ranks = batch_top_k(self.normalized_tfidf_matrix, query_matrix, k=k, min_score=min_score)
+        return [[(self.document_ids[row], score) for row, score in query_ranks] for query_ranks in ranks]
+
+if __name__ == "__main__":
+    print(benchmark())
+
     # iv = IndexProcessor(data_dir='./data')
     # iv.process_data()
 
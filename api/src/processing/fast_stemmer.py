@@ -0,0 +1,222 @@
+import time
+from typing import Dict, List, Optional, Tuple
+from src.processing.porter_stemmer import PorterStemmer
+
+VOWELS = frozenset("aeiou")
+
+
+def build_suffix_trie(suffixes: Dict[str, str]) -> dict:
+    """
+    Builds a trie over the reversed suffixes of a rule table. Terminal nodes hold
+    (rule order, suffix length, replacement) under the None key.
+
+    Args:
+        suffixes (Dict[str, str]): suffix -> replacement, in rule order
+
+    Returns:
+        dict: root node
+    """
+    root: dict = {}
+    for order, (suffix, replacement) in enumerate(suffixes.items()):
+        node = root
+        for char in reversed(suffix):
+            node = node.setdefault(char, {})
+        node[None] = (order, len(suffix), replacement)
+    return root
+
+
+def match_suffix(trie: dict, word: str, n: int) -> Optional[Tuple[int, int, str]]:
+    """
+    Walks word[:n] backwards through a suffix trie and returns the matching rule
+    that comes first in the table, like PorterStemmer's ordered endswith scan.
+    """
+    node = trie
+    found = None
+    for i in range(n - 1, -1, -1):
+        node = node.get(word[i])
+        if node is None:
+            break
+        rule = node.get(None)
+        if rule is not None and (found is None or rule[0] < found[0]):
+            found = rule
+    return found
+
+
+def replace_tail(word: str, measures: List[int], k: int, tail: str) -> str:
+    """
+    Returns word[:k] + tail and extends measures (measure of every prefix) over the new tail.
+    """
+    word = word[:k] + tail
+    del measures[k + 1:]
+    count = measures[k]
+    prev_vowel = k > 0 and word[k - 1] in VOWELS
+    for i in range(k, len(word)):
+        vowel = word[i] in VOWELS
+        if prev_vowel and not vowel:
+            count += 1
+        measures.append(count)
+        prev_vowel = vowel
+    return word
+
+
+def cvc(word: str, n: int) -> bool:
+    """
+    True if word[:n] ends consonant-vowel-consonant and the last letter is not w, x or y.
+    """
+    return (
+        n >= 3
+        and word[n - 3] not in VOWELS
+        and word[n - 2] in VOWELS
+        and word[n - 1] not in VOWELS
+        and word[n - 1] not in "wxy"
+    )
+
+
+class FastPorterStemmer:
+    def __init__(self) -> None:
+        """
+        Table-driven implementation of PorterStemmer with the same stem() output.
+        The measure of every prefix is computed once per word (letters are classified
+        on their own, as in PorterStemmer.is_consonant), rule suffixes are matched
+        through reversed-suffix tries and the word is only rebuilt when a rule
+        appends letters.
+        """
+        rules = PorterStemmer()
+        self.step2_trie = build_suffix_trie(rules.step2_sufixes)
+        self.step3_trie = build_suffix_trie(rules.step3_sufixes)
+        self.step4_trie = build_suffix_trie(rules.step4_sufixes)
+
+    def stem(self, word: str) -> str:
+        """
+        Main method to stem the word
+
+        Args:
+            word (str): English word
+
+        Returns:
+            str: Stemmed word
+        """
+        # abbreviations and words highlighted in capitals are kept as they are
+        if word == word.upper():
+            return word
+        w = word.lower()
+        n = len(w)
+
+        # measures[k] is the measure of w[:k]; first_vowel is the index of the first vowel
+        measures = [0] * (n + 1)
+        first_vowel = n + 1
+        count = 0
+        prev_vowel = False
+        for i, char in enumerate(w):
+            vowel = char in VOWELS
+            if vowel:
+                if first_vowel > i:
+                    first_vowel = i
+            elif prev_vowel:
+                count += 1
+            measures[i + 1] = count
+            prev_vowel = vowel
+
+        # step 1a
+        if w.endswith("sses") or w.endswith("ies"):
+            n -= 2
+        elif w.endswith("ss"):
+            pass
+        elif w.endswith("s"):
+            n -= 1
+
+        # step 1b
+        if w.endswith("eed", 0, n):
+            if measures[n - 3] > 0:
+                n -= 1
+        else:
+            flag = False
+            if w.endswith("ed", 0, n) and first_vowel < n - 2:
+                n -= 2
+                flag = True
+            if w.endswith("ing", 0, n) and first_vowel < n - 3:
+                n -= 3
+                flag = True
+            if flag:
+                if w.endswith("at", 0, n) or w.endswith("bl", 0, n) or w.endswith("iz", 0, n):
+                    w = replace_tail(w, measures, n, "e")
+                    n += 1
+                if n > 2 and w[n - 1] not in VOWELS and w[n - 2] not in VOWELS and w[n - 1] != "l":
+                    n -= 1
+                if measures[n] == 1 and cvc(w, n):
+                    w = replace_tail(w, measures, n, "e")
+                    n += 1
+
+        # step 1c
+        if n > 0 and w[n - 1] == "y" and first_vowel < n - 1:
+            w = replace_tail(w, measures, n - 1, "i")
+
+        # steps 2 and 3
+        for trie in (self.step2_trie, self.step3_trie):
+            rule = match_suffix(trie, w, n)
+            if rule is not None:
+                k = n - rule[1]
+                if measures[k] > 0:
+                    w = replace_tail(w, measures, k, rule[2])
+                    n = len(w)
+
+        # step 4
+        rule = match_suffix(self.step4_trie, w, n)
+        if rule is not None:
+            k = n - rule[1]
+            if measures[k] > 1:
+                n = k
+        elif w.endswith("ion", 0, n):
+            k = n - 3
+            if measures[k] > 1 and k > 0 and w[k - 1] in "st":
+                n = k
+
+        # step 5a
+        if n > 0 and w[n - 1] == "e":
+            k = n - 1
+            if measures[k] > 1 or (measures[k] == 1 and not cvc(w, k)):
+                n = k
+
+        # step 5b
+        if measures[n] > 1 and n >= 2 and w[n - 1] == "l" and w[n - 2] not in VOWELS:
+            n -= 1
+
+        return w[:n]
+
+
+def corpus_vocabulary(data_dir: str = "./data", exclude_files: List[str] = ["Stopword-List.txt"]) -> List[str]:
+    """
+    Returns every distinct preprocessed token of the corpus.
+    """
+    from src.processing.tokenizer import Tokenizer
+    from src.utils import list_files
+
+    tokenizer = Tokenizer()
+    words = set()
+    for file in list_files(data_dir, exclude_files):
+        for _, word in tokenizer.stream_words(file):
+            token = tokenizer.preprocess(word)
+            if token != "":
+                words.add(token)
+                words.add(word)
+    return sorted(words)
+
+
+def benchmark(words: List[str], rounds: int = 3) -> Dict[str, float]:
+    """
+    Measures stemming throughput (words per second) of both stemmers.
+    """
+    results = {}
+    for name, stemmer in [("porter", PorterStemmer()), ("fast", FastPorterStemmer())]:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for word in words:
+                stemmer.stem(word)
+        elapsed = time.perf_counter() - start
+        results[f"{name}_words_per_second"] = round(len(words) * rounds / elapsed)
+    results["speedup"] = round(results["fast_words_per_second"] / results["porter_words_per_second"], 2)
+    return results
+
+
+if __name__ == "__main__":
+    print(benchmark(corpus_vocabulary()))
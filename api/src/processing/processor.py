@@ -2,212 +2,856 @@ import os
 import re
 import json
 import logging
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from src.processing.tokenizer import Tokenizer
-from src.processing.porter_stemmer import PorterStemmer
+from src.processing.stem_cache import StemCache, get_stemmer
 from src.indexer.inverted_index import InvertedIndex
 from src.indexer.positional_index import PositionalIndex
+from src.indexer.binary_index import BinaryIndexWriter, doc_name, write_index, update_index
+from src.indexer.mapped_index import MappedIndex
+from src.indexer.spimi import SPIMIIndexer, JsonIndexWriter
+from src.indexer.document_store import DocumentStore
+from src.indexer.manifest import IndexManifest
+from src.processing.snippets import offsets_file, write_offsets
 from src.utils import *
-from src.logger import get_logger, log_message, metadata_lookup
-from typing import List, Dict, Tuple, Any
+from src.logger import get_logger, log_message
+from typing import List, Dict, Tuple, Any, Set, Iterable, Iterator
 
 INDEX_FILES = "indexes"
 VOCAB_FILES = "vocab"
+DOC_IDS_FILE = "./docs/doc-ids.json"
+DELETED_FILE = "./docs/deleted.json"
+INV_INDEX_FILE = "./docs/inv-index.bin"
+POS_INDEX_FILE = "./docs/pos-index.bin"
+BIWORD_INDEX_FILE = "./docs/biword-index.bin"
+INV_JSON_FILE = "./docs/inv-index.json"
+POS_JSON_FILE = "./docs/pos-index.json"
+STALE_FILE = "./docs/stale.json"
+DICT_SET_FILE = "./docs/dict-set.json"
+# saved files that incremental changes do not rewrite, the next process_data does
+STALE_FILES = (INV_JSON_FILE, POS_JSON_FILE)
+
+# per-process tokenizer/stemmer used by the index build workers
+_worker_tokenizer = None
+_worker_stemmer = None
+
+
+def analyze_words(
+    words: Iterable[Tuple[int, str]], tokenizer: Tokenizer, stemmer: StemCache
+) -> Iterator[Tuple[int, str, str]]:
+    """
+    Preprocesses and stems a stream of (position, word) pairs.
+
+    Args:
+        words (Iterable[Tuple[int, str]]): word positions and raw words
+        tokenizer (Tokenizer): Tokenizer used for preprocessing.
+        stemmer (PorterStemmer): Stemmer used for the index terms.
+
+    Returns:
+        Iterator[Tuple[int, str, str]]: position, token and stemmed token of every kept word
+    """
+    for i, word in words:
+        token = tokenizer.preprocess(word)
+        if token != "":
+            yield i, token, stemmer.stem(token.strip())
+
+
+def index_words(
+    words: Iterable[Tuple[int, str]], doc_id: str, tokenizer: Tokenizer, stemmer: StemCache
+) -> Tuple[Dict[str, Dict[str, int]], Dict[str, Dict[str, List[int]]], Dict[str, int], Dict[str, Any]]:
+    """
+    Tokenizes, stems and indexes a single document from a stream of (position, word) pairs.
+
+    Args:
+        words (Iterable[Tuple[int, str]]): word positions and raw words
+        doc_id (str): Document ID.
+        tokenizer (Tokenizer): Tokenizer used for preprocessing.
+        stemmer (PorterStemmer): Stemmer used for the index terms.
+
+    Returns:
+        Tuple: local inverted postings, local positional postings, local vocabulary and token statistics.
+        The statistics also hold the document's biword postings under "biwords".
+    """
+    local_inv_idx = InvertedIndex()
+    local_pos_idx = PositionalIndex()
+    # "term next_term" -> position of term, for consecutive kept tokens
+    local_bi_idx = PositionalIndex()
+    local_dict: Dict[str, int] = {}
+    tokens_length = 0
+    static_summary = ""
+    summary_token_length = 20
+    previous_token, previous_position = None, None
+    for i, token, stemmed_token in analyze_words(words, tokenizer, stemmer):
+        if previous_token is not None:
+            local_bi_idx.add_to_index(doc_id=doc_id, token=previous_token + " " + stemmed_token, position=previous_position)
+        previous_token, previous_position = stemmed_token, i
+        tokens_length += 1
+        if i < summary_token_length:
+            static_summary += token + " "
+        dict_token = token.lower()
+        if not tokenizer.has_number(dict_token):
+            local_dict[dict_token] = local_dict.get(dict_token, 0) + 1
+        local_inv_idx.add_to_index(doc_id=doc_id, token=stemmed_token)
+        local_pos_idx.add_to_index(doc_id=doc_id, token=stemmed_token, position=i)
+
+    stats = {
+        "tokens": tokens_length,
+        "unique_tokens": len(local_dict),
+        "stemmed_tokens": tokens_length,
+        "static_summary": static_summary,
+        "biwords": local_bi_idx.index,
+    }
+    return local_inv_idx.index, local_pos_idx.index, local_dict, stats
+
+
+def index_file(file_name: str, doc_id: str, tokenizer: Tokenizer, stemmer: StemCache):
+    """
+    Indexes a document by streaming it from disk in chunks, see index_words.
+    The byte offset of every word position is returned in the statistics as "offsets".
+    """
+    offsets = array("I")
+    document = index_words(record_offsets(tokenizer, file_name, offsets), doc_id, tokenizer, stemmer)
+    document[3]["offsets"] = offsets
+    return document
+
+
+def record_offsets(tokenizer: Tokenizer, file_name: str, offsets: array) -> Iterator[Tuple[int, str]]:
+    """
+    Streams (position, word) pairs from a file like Tokenizer.stream_words while
+    appending every word's byte offset to offsets (the document's token-offset table).
+    """
+    for position, word, offset in tokenizer.stream_word_offsets(file_name):
+        offsets.append(offset)
+        yield position, word
+
+
+def _init_worker() -> None:
+    """
+    Creates the tokenizer and stemmer once per worker process.
+    """
+    global _worker_tokenizer, _worker_stemmer
+    _worker_tokenizer = Tokenizer()
+    _worker_stemmer = get_stemmer()
+
+
+def _index_worker(task: Tuple[str, str]):
+    """
+    Reads and indexes one document inside a worker process.
+
+    Args:
+        task (Tuple[str, str]): file path and document ID.
+    """
+    file, doc_id = task
+    return index_file(file, doc_id, _worker_tokenizer, _worker_stemmer)
+
 
 class IndexProcessor:
-    def __init__(self, data_dir: str, exclude_files: List[str] = ["Stopword-List.txt"]) -> None:
+    def __init__(
+        self, data_dir: str, exclude_files: List[str] = ["Stopword-List.txt"], workers: int = 1, biword_index: bool = True
+    ) -> None:
         """
         Initializes an IndexProcessor instance.
 
         Args:
             data_dir (str): Data directory path.
             exclude_files (List[str]): List of files to exclude during processing. Default is ["Stopword-List.txt"].
+            workers (int): Number of worker processes used to build the index. 1 builds serially, None uses every core.
+            biword_index (bool): Also build the biword (next-word) index used by phrase queries.
         """
         self.data_dir = data_dir
         self.exclude_files = exclude_files
+        self.workers = workers if workers is not None else os.cpu_count() or 1
         self.inv_idx = InvertedIndex()
         self.pos_idx = PositionalIndex()
+        # False once the global indexes are only read from the binary files
+        self.in_memory = True
+        self.biword_index = biword_index
+        self.bi_idx = PositionalIndex()
         self.local_inv_idx = None
         self.local_pos_idx = None
+        # token -> frequency in the whole corpus
         self.dict_set: Dict[str, int] = {}
         self.local_dict: Dict[str, int] = {}
         self.tokenizer = Tokenizer()
-        self.stemmer = PorterStemmer()
-        
+        self.stemmer = get_stemmer()
+        self.index_dir = "./src/" + INDEX_FILES
+        self.vocab_dir = "./src/" + VOCAB_FILES
+        self.metadata_logger = get_logger("metadata", see_time=False, console_log = False, level = logging.INFO)
+        self.lookup_logger = get_logger("lookup", see_time = True, console_log = False, level = logging.INFO)
+        self.error_logger = get_logger("processor_error",see_time = True,console_log = CONSOLE_LOGS,level = logging.ERROR,)
+        self.doc_ids: Dict[str, str] = {}
+        self.deleted: Set[str] = set()
+        self.stale: Set[str] = set()
+        self.next_doc = 1
+        self.load_registry()
+        self.doc_store = DocumentStore()
+        self.manifest = IndexManifest()
+
+    def load_registry(self) -> None:
+        """
+        Loads the file path -> document ID registry, the deleted document IDs and the
+        saved files that are out of date.
+        Document IDs are assigned once per file and never reused, so adding a
+        file does not renumber the documents indexed before it.
+        """
+        if os.path.exists(DOC_IDS_FILE):
+            with open(DOC_IDS_FILE, "r", encoding="utf-8") as f:
+                self.doc_ids = json.load(f)
+        if os.path.exists(DELETED_FILE):
+            with open(DELETED_FILE, "r", encoding="utf-8") as f:
+                self.deleted = set(json.load(f))
+        if os.path.exists(STALE_FILE):
+            with open(STALE_FILE, "r", encoding="utf-8") as f:
+                self.stale = set(json.load(f))
+        numbers = [int(doc_id.split("_")[0]) for doc_id in list(self.doc_ids.values()) + list(self.deleted)]
+        self.next_doc = max(numbers, default=0) + 1
+
+    def save_registry(self) -> None:
+        """
+        Saves the document ID registry, the deleted document IDs, the stale files and the manifest.
+        """
+        os.makedirs("docs", exist_ok=True)
+        write_data(DOC_IDS_FILE, self.doc_ids)
+        write_data(DELETED_FILE, sorted(self.deleted))
+        write_data(STALE_FILE, sorted(self.stale))
+        self.manifest.save()
+
+    def get_doc_id(self, file: str) -> str:
+        """
+        Returns the stable document ID of a file, assigning the next free one to new files.
+
+        Args:
+            file (str): file path
+
+        Returns:
+            str: document ID of the form "N_name"
+        """
+        path = os.path.normpath(file)
+        if path not in self.doc_ids:
+            name = re.findall(r'[^\\/]*$', path)[0].split(".")[0]
+            self.doc_ids[path] = str(self.next_doc) + "_" + name
+            self.next_doc += 1
+        return self.doc_ids[path]
+
+    def deleted_docs(self) -> Set[str]:
+        """
+        Returns the names (as reported by the models) of deleted documents
+        that are not shadowed by a live document with the same name.
+        """
+        live = {doc_name(doc_id) for doc_id in self.doc_ids.values() if doc_id not in self.deleted}
+        return {doc_name(doc_id) for doc_id in self.deleted} - live
+
     @time_logger
     def process_data(self) -> Tuple[InvertedIndex, PositionalIndex, Dict[str, int]]:
         """
         Reads data from the directory and creates positional and inverted indexes.
+        Files that are unchanged since they were indexed are loaded from their segments,
+        new and changed files are (re-)indexed. With more than one worker, documents are
+        indexed in a process pool and merged back in file order, so the result matches
+        the serial build. The saved indexes are only rewritten if an input changed.
         """
-        files = list_files(self.data_dir, self.exclude_files)
-        index_dir = "./src/" + INDEX_FILES
-        vocab_file = "./src/" + VOCAB_FILES
+        index_dir = self.index_dir
+        vocab_file = self.vocab_dir
         os.makedirs(index_dir, exist_ok=True)
         os.makedirs(vocab_file, exist_ok=True)
-        metadata_logger = get_logger("metadata", see_time=False, console_log = False, level = logging.INFO)
-        lookup_logger = get_logger("lookup", see_time = True, console_log = False, level = logging.INFO)
-        error_logger = get_logger("processor_error",see_time = True,console_log = CONSOLE_LOGS,level = logging.ERROR,)
-        logged_metadata = read_metadata("metadata")
-        file_iter = 1
-
-        for file in files:
-            self.local_inv_idx = InvertedIndex()
-            self.local_pos_idx = PositionalIndex()
-            self.local_dict = {}
-            if file.endswith(".txt"):
-                data = read_data(file)
-                doc_id = re.findall(r'[^\\/]*$', file)
-                doc_id = doc_id[0].split(".")[0]
-                doc_id = str(file_iter) + "_" + doc_id
-                file_iter += 1
+        metadata_logger = self.metadata_logger
+        lookup_logger = self.lookup_logger
+        error_logger = self.error_logger
+
+        tasks = self.list_tasks()
+        current = self.saved_files_current(tasks)
+        self.prune_vanished(tasks)
+        self.in_memory = True
+        self.dict_set = {}
+        cached = self.cached_documents(tasks)
+        self.restore_records(tasks)
+
+        if self.workers > 1:
+            self.process_parallel(tasks, index_dir, vocab_file, cached, metadata_logger, lookup_logger, error_logger)
+        else:
+            for file, doc_id in tasks:
                 self.process_file(
-                    data,
+                    file,
                     doc_id,
                     index_dir,
                     vocab_file,
-                    logged_metadata,
+                    cached,
                     metadata_logger,
                     lookup_logger,
                     error_logger,
                 )
 
-        self.save_indexes()
+        if not current or len(cached) < len(tasks):
+            self.save_indexes()
+            self.save_registry()
         return self.inv_idx, self.pos_idx, self.dict_set
 
-    def process_file(
+    def list_tasks(self) -> List[Tuple[str, str]]:
+        """
+        Returns the (file path, document ID) pairs of the live documents in the data
+        directory, in processing order. New files are assigned their document ID.
+        """
+        tasks = []
+        for file in list_files(self.data_dir, self.exclude_files):
+            if file.endswith(".txt"):
+                doc_id = self.get_doc_id(file)
+                if doc_id not in self.deleted:
+                    tasks.append((file, doc_id))
+        return tasks
+
+    def saved_files_current(self, tasks: List[Tuple[str, str]]) -> bool:
+        """
+        True if every saved index file exists, none of them is stale, and the manifest
+        and the document store list exactly the files and documents of tasks, i.e. no
+        file was added or removed since. Changes to the contents are found by cached_documents.
+
+        Args:
+            tasks (List[Tuple[str, str]]): (file path, document ID) pairs
+        """
+        saved = [INV_INDEX_FILE, POS_INDEX_FILE, DICT_SET_FILE, *STALE_FILES]
+        if self.biword_index:
+            saved.append(BIWORD_INDEX_FILE)
+        if self.stale or not all(os.path.exists(file_name) for file_name in saved):
+            return False
+        if set(self.doc_store.docs) != {doc_id for _, doc_id in tasks}:
+            return False
+        return set(self.manifest.entries) == {os.path.normpath(file) for file, _ in tasks}
+
+    def prune_vanished(self, tasks: List[Tuple[str, str]]) -> None:
+        """
+        Drops the manifest entries and document store records of files that are no
+        longer in the data directory.
+
+        Args:
+            tasks (List[Tuple[str, str]]): (file path, document ID) pairs
+        """
+        live = {os.path.normpath(file) for file, _ in tasks}
+        for path in set(self.manifest.entries) - live:
+            self.manifest.remove(path)
+        live_docs = {doc_id for _, doc_id in tasks}
+        for doc_id in set(self.doc_store.docs) - live_docs:
+            self.doc_store.remove(doc_id)
+
+    def load_saved_indexes(self) -> bool:
+        """
+        Startup without process_data: if the saved indexes are current (no file in the
+        data directory is new, changed or gone according to the manifest, and no saved
+        file is stale), only the dictionary set is loaded. The global indexes stay on
+        disk, open them with open_mapped_indexes.
+
+        Returns:
+            bool: True if the saved indexes are current, False if process_data has to run
+        """
+        tasks = self.list_tasks()
+        if not self.saved_files_current(tasks):
+            return False
+        if len(self.cached_documents(tasks)) < len(tasks):
+            return False
+        with open(DICT_SET_FILE, "r", encoding="utf-8") as f:
+            self.dict_set = json.load(f)
+        self.release_indexes()
+        return True
+
+    def release_indexes(self) -> None:
+        """
+        Drops the in-memory global indexes once the binary index files are used instead.
+        Incremental changes then only update the binary files.
+        """
+        self.inv_idx = InvertedIndex()
+        self.pos_idx = PositionalIndex()
+        self.bi_idx = PositionalIndex()
+        self.in_memory = False
+
+    def cached_documents(self, tasks: List[Tuple[str, str]]) -> Set[str]:
+        """
+        Returns the IDs of the documents whose segments are current, using the manifest:
+        unchanged files are recognised by size and mtime, touched ones by content hash.
+        Segments written before the manifest existed are trusted if their metadata was
+        logged, and their files are recorded in the manifest. Documents without a
+        token-offset table are re-indexed so that snippets never build one at query time.
+
+        Args:
+            tasks (List[Tuple[str, str]]): (file path, document ID) pairs
+
+        Returns:
+            Set[str]: document IDs that can be loaded from their segments
+        """
+        cached = set()
+        logged_segments = None
+        for file, doc_id in tasks:
+            paths = list(self.segment_paths(doc_id, self.index_dir, self.vocab_dir))
+            paths.append(offsets_file(self.index_dir, doc_id))
+            if self.biword_index:
+                paths.append(self.biword_path(doc_id, self.index_dir))
+            if not all(os.path.exists(path) for path in paths):
+                continue
+            if file not in self.manifest:
+                if logged_segments is None:
+                    logged_segments = {entry["doc_id"] for entry in read_metadata("metadata") if entry.get("segment")}
+                if doc_id not in logged_segments:
+                    continue
+                self.manifest.record(file, doc_id)
+            elif not self.manifest.is_current(file, doc_id):
+                log_message(f"{file} changed since it was indexed, re-indexing {doc_id}", self.lookup_logger)
+                continue
+            cached.add(doc_id)
+        return cached
+
+    def restore_records(self, tasks: List[Tuple[str, str]]) -> None:
+        """
+        Fills the document store for documents that were indexed before it existed,
+        from their logged metadata. The log is only read if a record is missing.
+
+        Args:
+            tasks (List[Tuple[str, str]]): (file path, document ID) pairs
+        """
+        missing = [(file, doc_id) for file, doc_id in tasks if doc_id not in self.doc_store]
+        if not missing:
+            return
+        logged = {entry["doc_id"]: entry for entry in read_metadata("metadata")}
+        for file, doc_id in missing:
+            if doc_id in logged:
+                self.doc_store.put(dict(logged[doc_id], path=os.path.normpath(file)))
+
+    @time_logger
+    def add_document(self, file: str) -> str:
+        """
+        Indexes a new file and appends its postings to the global indexes.
+        A file that is already indexed is updated instead.
+
+        Args:
+            file (str): file path inside the data directory
+
+        Returns:
+            str: document ID of the file
+        """
+        path = os.path.normpath(file)
+        if path in self.doc_ids and self.doc_ids[path] not in self.deleted:
+            return self.update_document(file)
+        # a deleted file that comes back gets a fresh ID, its old segment stays dead
+        self.doc_ids.pop(path, None)
+        doc_id = self.get_doc_id(file)
+        os.makedirs(self.index_dir, exist_ok=True)
+        os.makedirs(self.vocab_dir, exist_ok=True)
+        document = index_file(file, doc_id, self.tokenizer, self.stemmer)
+        self.merge_document(doc_id, document, self.index_dir, self.vocab_dir, self.metadata_logger, file)
+        self.commit_changes(doc_id, ([], [], {}), document)
+        return doc_id
+
+    @time_logger
+    def update_document(self, file: str) -> str:
+        """
+        Re-indexes a changed file, replacing its postings and segment.
+
+        Args:
+            file (str): file path inside the data directory
+
+        Returns:
+            str: document ID of the file
+        """
+        path = os.path.normpath(file)
+        if path not in self.doc_ids or self.doc_ids[path] in self.deleted:
+            return self.add_document(file)
+        doc_id = self.doc_ids[path]
+        old_terms = self.segment_terms(doc_id)
+        self.remove_postings(doc_id, *old_terms)
+        document = index_file(file, doc_id, self.tokenizer, self.stemmer)
+        self.merge_document(doc_id, document, self.index_dir, self.vocab_dir, self.metadata_logger, file)
+        self.commit_changes(doc_id, old_terms, document)
+        return doc_id
+
+    @time_logger
+    def delete_document(self, file: str) -> str:
+        """
+        Records a file as deleted and drops its postings from the global indexes.
+        Its segment is kept on disk but is skipped from now on.
+
+        Args:
+            file (str): file path
+
+        Returns:
+            str: document ID of the deleted file, "" if the file was never indexed
+        """
+        path = os.path.normpath(file)
+        if path not in self.doc_ids or self.doc_ids[path] in self.deleted:
+            return ""
+        doc_id = self.doc_ids[path]
+        self.deleted.add(doc_id)
+        self.doc_store.remove(doc_id)
+        self.manifest.remove(file)
+        old_terms = self.segment_terms(doc_id)
+        self.remove_postings(doc_id, *old_terms)
+        self.commit_changes(doc_id, old_terms)
+        return doc_id
+
+    def segment_terms(self, doc_id: str) -> Tuple[List[str], List[str], Dict[str, int]]:
+        """
+        Returns the index terms, the biwords and the vocabulary (token -> frequency) of a
+        document's segment, empty if it has none.
+
+        Args:
+            doc_id (str): Document ID.
+        """
+        inv_index_file, _, vocab_dict_file = self.segment_paths(doc_id, self.index_dir, self.vocab_dir)
+        biword_file = self.biword_path(doc_id, self.index_dir)
+        terms, biwords, vocab = [], [], {}
+        if os.path.exists(inv_index_file):
+            with open(inv_index_file, "r", encoding="utf-8") as f:
+                terms = list(json.load(f).keys())
+        if self.biword_index and os.path.exists(biword_file):
+            with open(biword_file, "r", encoding="utf-8") as f:
+                biwords = list(json.load(f).keys())
+        if os.path.exists(vocab_dict_file):
+            with open(vocab_dict_file, "r", encoding="utf-8") as f:
+                vocab = json.load(f)
+        return terms, biwords, vocab
+
+    def add_vocabulary(self, vocab: Dict[str, int]) -> None:
+        """
+        Adds a document's token frequencies to dict_set, which holds the corpus frequency of every token.
+        """
+        for token, freq in vocab.items():
+            self.dict_set[token] = self.dict_set.get(token, 0) + freq
+
+    def remove_vocabulary(self, vocab: Dict[str, int]) -> None:
+        """
+        Subtracts a document's token frequencies from dict_set, tokens that reach zero are dropped.
+        """
+        for token, freq in vocab.items():
+            remaining = self.dict_set.get(token, 0) - freq
+            if remaining > 0:
+                self.dict_set[token] = remaining
+            else:
+                self.dict_set.pop(token, None)
+
+    def remove_postings(self, doc_id: str, terms: List[str], biwords: List[str], vocab: Dict[str, int]) -> None:
+        """
+        Removes a document's postings from the global indexes and its token frequencies from dict_set.
+
+        Args:
+            doc_id (str): Document ID.
+            terms (List[str]): index terms of the document, see segment_terms
+            biwords (List[str]): biwords of the document
+            vocab (Dict[str, int]): token frequencies of the document
+        """
+        self.remove_vocabulary(vocab)
+        segments = [(self.inv_idx.index, terms), (self.pos_idx.index, terms)]
+        if self.biword_index:
+            segments.append((self.bi_idx.index, biwords))
+        for index, keys in segments:
+            for term in keys:
+                postings = index.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del index[term]
+
+    def commit_changes(
         self,
-        data: str,
         doc_id: str,
+        old_terms: Tuple[List[str], List[str], Dict[str, int]],
+        document: Tuple[Dict[str, Dict[str, int]], Dict[str, Dict[str, List[int]]], Dict[str, int], Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Persists an incremental change of one document. Only its postings are replaced in
+        the binary indexes, the postings of every other term are copied as they are, and
+        the dictionary set is saved. The JSON snapshots are not rewritten but marked stale,
+        the next process_data rebuilds them. The saved vector space matrices no longer
+        match the index fingerprint, so the next VectorSpaceModel rebuilds them.
+
+        Args:
+            doc_id (str): Document ID.
+            old_terms (Tuple): index terms, biwords and vocabulary of the document before the change
+            document (Tuple): Output of index_file for the document, None if it was deleted.
+        """
+        terms, biwords, _ = old_terms
+        inv_postings, pos_postings, _, stats = document if document is not None else ({}, {}, {}, {})
+        changes = [(INV_INDEX_FILE, False, terms, inv_postings), (POS_INDEX_FILE, True, terms, pos_postings)]
+        if self.biword_index:
+            changes.append((BIWORD_INDEX_FILE, True, biwords, stats.get("biwords", {})))
+        os.makedirs("docs", exist_ok=True)
+        for file_name, positional, old_keys, postings in changes:
+            if not os.path.exists(file_name):
+                write_index(file_name, {}, positional)
+            update_index(file_name, doc_id, old_keys, postings)
+        write_data(DICT_SET_FILE, self.dict_set)
+        self.stale.update(STALE_FILES)
+        self.save_registry()
+        self.doc_store.save()
+        self.stemmer.save()
+
+    @time_logger
+    def process_spimi(self, memory_budget: int = 64 * 1024 * 1024) -> Dict[str, int]:
+        """
+        Rebuilds every saved index with single-pass in-memory indexing: the global
+        indexes are never held in memory. Each document is indexed and recorded like
+        in process_data (segment, document store record, manifest entry, vocabulary),
+        then its positional and biword postings go to SPIMI blocks that are flushed to
+        sorted runs whenever they reach memory_budget. The runs are merged straight into
+        the binary indexes and the JSON snapshots, so load_saved_indexes accepts the
+        result. Open it with open_mapped_indexes.
+
+        Args:
+            memory_budget (int): approximate size in bytes of each in-memory block
+
+        Returns:
+            Dict[str, int]: dictionary set of the corpus
+        """
+        os.makedirs("docs", exist_ok=True)
+        os.makedirs(self.index_dir, exist_ok=True)
+        os.makedirs(self.vocab_dir, exist_ok=True)
+        tasks = self.list_tasks()
+        self.prune_vanished(tasks)
+        self.release_indexes()
+        self.dict_set = {}
+        indexer = SPIMIIndexer(run_dir="./docs/spimi", memory_budget=memory_budget)
+        biword_indexer = SPIMIIndexer(run_dir="./docs/spimi-biwords", memory_budget=memory_budget) if self.biword_index else None
+        for file, doc_id in tasks:
+            document = index_file(file, doc_id, self.tokenizer, self.stemmer)
+            self.merge_document(doc_id, document, self.index_dir, self.vocab_dir, self.metadata_logger, file)
+            for token, postings in document[1].items():
+                indexer.add(doc_id, token, postings[doc_id])
+            if biword_indexer is not None:
+                for biword, postings in document[3]["biwords"].items():
+                    biword_indexer.add(doc_id, biword, postings[doc_id])
+
+        with BinaryIndexWriter(INV_INDEX_FILE, positional=False) as inv_writer, \
+                BinaryIndexWriter(POS_INDEX_FILE, positional=True) as pos_writer, \
+                JsonIndexWriter(INV_JSON_FILE) as inv_json, JsonIndexWriter(POS_JSON_FILE) as pos_json:
+            runs = indexer.merge([(inv_writer, False), (pos_writer, True), (inv_json, False), (pos_json, True)])
+        if biword_indexer is not None:
+            with BinaryIndexWriter(BIWORD_INDEX_FILE, positional=True) as bi_writer:
+                runs += biword_indexer.merge([(bi_writer, True)])
+        log_message(f"SPIMI build merged {runs} runs", self.lookup_logger)
+        with open(DICT_SET_FILE, "w", encoding="utf-8") as f:
+            json.dump(self.dict_set, f, indent=4)
+        self.stale.clear()
+        self.save_registry()
+        self.doc_store.save()
+        self.stemmer.save()
+        return self.dict_set
+
+    def process_parallel(
+        self,
+        tasks: List[Tuple[str, str]],
         index_dir: str,
         vocab_file: str,
-        logged_metadata: Dict[str, str],
+        cached: Set[str],
         metadata_logger,
         lookup_logger,
         error_logger,
     ) -> None:
         """
-        Processes an individual file, updating indexes and metadata.
+        Indexes the documents that are not cached yet in a process pool and merges
+        every document into the global indexes in file order.
 
         Args:
-            data (str): Content of the file.
-            doc_id (str): Document ID.
+            tasks (List[Tuple[str, str]]): (file path, document ID) pairs in processing order.
             index_dir (str): Directory to save index files.
             vocab_file (str): Directory to save vocabulary files.
-            logged_metadata (Dict[str, str]): Previously logged metadata.
+            cached (Set[str]): IDs of the documents with current segments.
             metadata_logger: Logger for metadata.
             lookup_logger: Logger for metadata lookup.
             error_logger: Logger for errors.
         """
+        pending = [task for task in tasks if task[1] not in cached]
+        chunksize = max(1, len(pending) // (self.workers * 4))
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as executor:
+            results = executor.map(_index_worker, pending, chunksize=chunksize)
+            for file, doc_id in tasks:
+                inv_index_file, pos_index_file, vocab_dict_file = self.segment_paths(doc_id, index_dir, vocab_file)
+                if doc_id in cached:
+                    self.load_indexes(
+                        inv_index_file, pos_index_file, vocab_dict_file, error_logger, self.biword_path(doc_id, index_dir)
+                    )
+                else:
+                    self.merge_document(doc_id, next(results), index_dir, vocab_file, metadata_logger, file)
+
+    def segment_paths(self, doc_id: str, index_dir: str, vocab_file: str) -> Tuple[str, str, str]:
+        """
+        Returns the per-document inverted index, positional index and vocabulary file paths.
+        """
         inv_index_file = os.path.join(index_dir, f"{doc_id}_ivnIdx.json")
         pos_index_file = os.path.join(index_dir, f"{doc_id}_posIdx.json")
         vocab_dict_file = os.path.join(vocab_file, f"{doc_id}_vocab.json")
+        return inv_index_file, pos_index_file, vocab_dict_file
 
-        metadata = {"doc_id": doc_id}
-        if metadata_lookup(metadata, logged_metadata, logger=lookup_logger):
-            self.load_indexes(inv_index_file, pos_index_file, vocab_dict_file, error_logger)
+    def biword_path(self, doc_id: str, index_dir: str) -> str:
+        """
+        Returns the per-document biword index file path.
+        """
+        return os.path.join(index_dir, f"{doc_id}_biIdx.json")
+
+    def process_file(
+        self,
+        file: str,
+        doc_id: str,
+        index_dir: str,
+        vocab_file: str,
+        cached: Set[str],
+        metadata_logger,
+        lookup_logger,
+        error_logger,
+    ) -> None:
+        """
+        Processes an individual file, streaming it from disk and updating indexes and metadata.
+
+        Args:
+            file (str): File path.
+            doc_id (str): Document ID.
+            index_dir (str): Directory to save index files.
+            vocab_file (str): Directory to save vocabulary files.
+            cached (Set[str]): IDs of the documents with current segments.
+            metadata_logger: Logger for metadata.
+            lookup_logger: Logger for metadata lookup.
+            error_logger: Logger for errors.
+        """
+        inv_index_file, pos_index_file, vocab_dict_file = self.segment_paths(doc_id, index_dir, vocab_file)
+
+        if doc_id in cached:
+            log_message(f"Processing already done for {doc_id}.txt", lookup_logger)
+            self.load_indexes(
+                inv_index_file, pos_index_file, vocab_dict_file, error_logger, self.biword_path(doc_id, index_dir)
+            )
             return
 
-        tokens_length = 0
-        stemmed_token_length = 0
-        static_summary = ""
-        summary_token_length = 20
-        pattern = self.tokenizer.get_pattern()
-        for i, word in enumerate(re.findall(pattern, data)):
-            
-            token = self.tokenizer.preprocess(word)
-                
-            tokens_length += 1 if token != "" else 0
-            if token != "":
-                if i < summary_token_length:
-                    static_summary += token + " "
-                stemmed_token = self.stemmer.stem(token.strip())
-                stemmed_token_length += 1
-                dict_token = token.lower()
-                self.update_dict(doc_id, dict_token)
-                self.update_indexes(doc_id, stemmed_token, i)        
+        document = index_file(file, doc_id, self.tokenizer, self.stemmer)
+        self.merge_document(doc_id, document, index_dir, vocab_file, metadata_logger, file)
+
+    def merge_document(
+        self,
+        doc_id: str,
+        document: Tuple[Dict[str, Dict[str, int]], Dict[str, Dict[str, List[int]]], Dict[str, int], Dict[str, Any]],
+        index_dir: str,
+        vocab_file: str,
+        metadata_logger,
+        file: str = "",
+    ) -> None:
+        """
+        Merges one indexed document into the global indexes and writes its metadata,
+        its document store record and its immutable index segment (the document's
+        own postings, vocabulary and token-offset table).
+
+        Args:
+            doc_id (str): Document ID.
+            document (Tuple): Output of index_file for this document.
+            index_dir (str): Directory to save index files.
+            vocab_file (str): Directory to save vocabulary files.
+            metadata_logger: Logger for metadata.
+            file (str): File path of the document.
+        """
+        inv_postings, pos_postings, local_dict, stats = document
+        inv_index_file, pos_index_file, vocab_dict_file = self.segment_paths(doc_id, index_dir, vocab_file)
+
+        self.local_inv_idx = InvertedIndex()
+        self.local_inv_idx.index = inv_postings
+        self.local_pos_idx = PositionalIndex()
+        self.local_pos_idx.index = pos_postings
+        self.local_dict = local_dict
+
+        if self.in_memory:
+            for token, postings in inv_postings.items():
+                self.inv_idx.index.setdefault(token, {}).update(postings)
+            for token, postings in pos_postings.items():
+                self.pos_idx.index.setdefault(token, {}).update(postings)
+            if self.biword_index:
+                for biword, postings in stats["biwords"].items():
+                    self.bi_idx.index.setdefault(biword, {}).update(postings)
+        self.add_vocabulary(local_dict)
 
+        metadata = {"doc_id": doc_id}
         metadata.update(
                 {
-                    "tokens": tokens_length,
-                    "unique_tokens": len(self.local_dict),
-                    "stemmed_tokens": stemmed_token_length,
+                    "path": os.path.normpath(file) if file else "",
+                    "tokens": stats["tokens"],
+                    "unique_tokens": stats["unique_tokens"],
+                    "stemmed_tokens": stats["stemmed_tokens"],
                     "inv_index_file": inv_index_file,
                     "pos_index_file": pos_index_file,
                     "vocab_file": vocab_dict_file,
-                    "static_summary": static_summary
+                    "segment": True,
+                    "static_summary": stats["static_summary"]
                 }
             )
 
         log_message(json.dumps(metadata, indent=4), logger=metadata_logger)
+        self.doc_store.put(metadata)
 
-        write_data(inv_index_file, self.inv_idx.index)
-        write_data(pos_index_file, self.pos_idx.index)
-        write_data(vocab_dict_file, self.dict_set)
-
-    def update_dict(self, doc_id: str, dict_token: str) -> None:
-        """
-        Updates the local dictionary.
-
-        Args:
-            doc_id (str): Document ID.
-            dict_token (str): Token in the original form.
-        """
-        if not self.tokenizer.has_number(dict_token):
-            if dict_token not in self.local_dict:
-                self.local_dict[dict_token] = 1
-                self.dict_set[dict_token] = 1
-            else:
-                self.local_dict[dict_token] += 1
-                self.dict_set[dict_token] += 1
-
-    def update_indexes(self, doc_id: str, stemmed_token: str, position: int) -> None:
-        """
-        Updates  indexes..
-
-        Args:
-            doc_id (str): Document ID.
-            stemmed_token (str): Stemmed token.
-            position (int): Token position in the document.
-        """
-        self.local_inv_idx.add_to_index(doc_id=doc_id, token=stemmed_token)
-        self.local_pos_idx.add_to_index(
-            doc_id=doc_id, token=stemmed_token, position=position
-        )
-        self.inv_idx.add_to_index(doc_id=doc_id, token=stemmed_token)
-        self.pos_idx.add_to_index(doc_id=doc_id, token=stemmed_token, position=position)
+        # segments hold only this document's postings and are merged back on load
+        write_data(inv_index_file, inv_postings)
+        write_data(pos_index_file, pos_postings)
+        write_data(vocab_dict_file, local_dict)
+        if self.biword_index:
+            write_data(self.biword_path(doc_id, index_dir), stats["biwords"])
+        if "offsets" in stats:
+            write_offsets(offsets_file(index_dir, doc_id), stats["offsets"])
+        if file:
+            self.manifest.record(file, doc_id)
 
     @time_logger
-    def load_indexes(self, inv_index_file: str, pos_index_file: str, vocab_dict_file: str, error_logger) -> None:
+    def load_indexes(
+        self, inv_index_file: str, pos_index_file: str, vocab_dict_file: str, error_logger, biword_file: str = None
+    ) -> None:
         """
-        Loads indexes from saved files.
+        Loads a document segment and merges it into the global indexes.
 
         Args:
             inv_index_file (str): Inverted index file path.
             pos_index_file (str): Positional index file path.
             vocab_dict_file (str): Vocabulary dictionary file path.
             error_logger: Logger for errors.
+            biword_file (str): Biword index file path, loaded if the biword index is enabled.
         """
         self.inv_idx.load_from_file(inv_index_file, logger=error_logger)
         self.pos_idx.load_from_file(pos_index_file, logger=error_logger)
+        if self.biword_index and biword_file is not None:
+            self.bi_idx.load_from_file(biword_file, logger=error_logger)
         with open(vocab_dict_file, "r", encoding="utf-8") as f:
             vocab = json.load(f)
         for token, freq in vocab.items():
             if isinstance(freq, int):
-                self.dict_set[token] = freq
+                self.dict_set[token] = self.dict_set.get(token, 0) + freq
             else:
                 self.dict_set.setdefault(token, {}).update(freq)
 
     @time_logger
     def save_indexes(self) -> None:
         """
-        Saves the global indexes to files.
+        Saves the global indexes to files, as JSON and in the compact binary format
+        (the biword index only in the binary format), together with the document
+        store and the stem cache. None of the saved files is stale afterwards.
         """
         os.makedirs("docs", exist_ok=True)
-        with open("./docs/inv-index.json", "w", encoding="utf-8") as f:
+        with open(INV_JSON_FILE, "w", encoding="utf-8") as f:
             json.dump(self.inv_idx.index, f, indent=4)
-        with open("./docs/pos-index.json", "w", encoding="utf-8") as f:
+        with open(POS_JSON_FILE, "w", encoding="utf-8") as f:
             json.dump(self.pos_idx.index, f, indent=4)
-        with open("./docs/dict-set.json", "w", encoding="utf-8") as f:
+        with open(DICT_SET_FILE, "w", encoding="utf-8") as f:
             json.dump(self.dict_set, f, indent=4)
+        write_index(INV_INDEX_FILE, self.inv_idx.index, positional=False)
+        write_index(POS_INDEX_FILE, self.pos_idx.index, positional=True)
+        if self.biword_index:
+            write_index(BIWORD_INDEX_FILE, self.bi_idx.index, positional=True)
+        self.doc_store.save()
+        self.stemmer.save()
+        self.stale.clear()
+        log_message(f"Stem cache: {self.stemmer.stats()}", self.lookup_logger)
 
+    def open_mapped_indexes(self) -> Tuple[MappedIndex, MappedIndex]:
+        """
+        Opens the saved binary indexes as memory-mapped, lazily decoded views
+        that the retrieval models can share.
 
+        Returns:
+            Tuple[MappedIndex, MappedIndex]: inverted and positional index
+        """
+        return MappedIndex(INV_INDEX_FILE), MappedIndex(POS_INDEX_FILE)
 
+    def open_mapped_biwords(self) -> MappedIndex:
+        """
+        Opens the saved biword index as a memory-mapped view, None if it is not built.
+        """
+        if not self.biword_index or not os.path.exists(BIWORD_INDEX_FILE):
+            return None
+        return MappedIndex(BIWORD_INDEX_FILE)
@@ -0,0 +1,172 @@
+import os
+import re
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Mapping, Tuple
+from src.processing.tokenizer import Tokenizer
+from src.processing.stem_cache import get_stemmer
+from src.indexer.document_store import DocumentStore
+
+
+def offsets_file(index_dir: str, doc_id: str) -> str:
+    """
+    Returns the path of a document's token-offset table: the byte offset of every
+    word position in the document, stored as native array('I') values.
+    """
+    return os.path.join(index_dir, f"{doc_id}_offsets.bin")
+
+
+def write_offsets(file_name: str, offsets: array) -> None:
+    with open(file_name, "wb") as f:
+        offsets.tofile(f)
+
+
+def densest_window(hits: List[Tuple[int, str]], width: int) -> Tuple[int, int]:
+    """
+    Finds the span of at most width word positions holding the most distinct query
+    terms (ties go to the most hits, then the earliest span) in one sliding pass.
+
+    Args:
+        hits (List[Tuple[int, str]]): (position, term) of every query term occurrence, sorted by position
+        width (int): maximum span in word positions
+
+    Returns:
+        Tuple[int, int]: first and last hit position of the span
+    """
+    counts: Dict[str, int] = {}
+    best = (0, 0, 0, 0)
+    left = 0
+    for right, (position, term) in enumerate(hits):
+        counts[term] = counts.get(term, 0) + 1
+        while position - hits[left][0] >= width:
+            left_term = hits[left][1]
+            counts[left_term] -= 1
+            if counts[left_term] == 0:
+                del counts[left_term]
+            left += 1
+        if (len(counts), right - left + 1) > best[:2]:
+            best = (len(counts), right - left + 1, hits[left][0], position)
+    return best[2], best[3]
+
+
+class SnippetGenerator:
+    def __init__(
+        self,
+        pos_idx: Mapping[str, Mapping[str, List[int]]],
+        doc_store: DocumentStore,
+        index_dir: str = "./src/indexes",
+        width: int = 30,
+        context: int = 5,
+        cache_size: int = 4096,
+    ) -> None:
+        """
+        Query-dependent keyword-in-context snippets. The query terms' positions come from
+        the positional index, the densest window of them is located with densest_window and
+        the window's text is read from the original file with a single seek, using the
+        document's token-offset table. Snippets are cached per (document, query terms).
+
+        Args:
+            pos_idx (Mapping): positional index, term -> doc_id -> positions
+            doc_store (DocumentStore): document records (paths and static summaries)
+            index_dir (str): directory holding the token-offset tables
+            width (int): maximum span of query terms in a snippet, in words
+            context (int): words shown on each side of the span
+            cache_size (int): maximum number of cached snippets
+        """
+        self.pos_idx = pos_idx
+        self.doc_store = doc_store
+        self.index_dir = index_dir
+        self.width = width
+        self.context = context
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[Tuple[str, Tuple[str, ...]], str]" = OrderedDict()
+        self.tokenizer = Tokenizer()
+        self.stemmer = get_stemmer()
+
+    def query_terms(self, query: str) -> Tuple[str, ...]:
+        """
+        Returns the sorted, stemmed index terms of a query. Boolean operators and
+        negated terms are left out since they are not expected in the results.
+        """
+        terms = set()
+        negated = False
+        for word in re.findall(self.tokenizer.get_pattern(), query):
+            if word in ("AND", "OR"):
+                continue
+            if word == "NOT":
+                negated = True
+                continue
+            token = self.tokenizer.preprocess(word)
+            if token != "" and not negated:
+                terms.add(self.stemmer.stem(token.strip()))
+            negated = False
+        return tuple(sorted(terms))
+
+    def snippets(self, names: List[str], query: str) -> List[str]:
+        """
+        Returns a snippet for every result, falling back to the static summary
+        of documents without query term occurrences.
+
+        Args:
+            names (List[str]): document names as returned by the models
+            query (str): user query string
+        """
+        terms = self.query_terms(query)
+        return [self.snippet(name, terms) or self.doc_store.summary(name) for name in names]
+
+    def snippet(self, name: str, terms: Tuple[str, ...]) -> str:
+        """
+        Returns the cached snippet of a document for the given query terms, "" if none of them occur.
+        """
+        record = self.doc_store.by_name(name)
+        if not record or not terms:
+            return ""
+        key = (record["doc_id"], terms)
+        snippet = self.cache.get(key)
+        if snippet is not None:
+            self.cache.move_to_end(key)
+            return snippet
+        snippet = self.make_snippet(record, terms)
+        self.cache[key] = snippet
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return snippet
+
+    def make_snippet(self, record: Dict, terms: Tuple[str, ...]) -> str:
+        doc_id = record["doc_id"]
+        hits = []
+        for term in terms:
+            if term in self.pos_idx:
+                hits.extend((position, term) for position in self.pos_idx[term].get(doc_id, ()))
+        if not hits or not record.get("path"):
+            return ""
+        hits.sort()
+        first, last = densest_window(hits, self.width)
+        start = max(0, first - self.context)
+        # first word after the snippet, its offset ends the read
+        end = last + self.context + 1
+
+        offsets = self.read_offsets(doc_id, start, end + 1)
+        if not offsets:
+            return ""
+        complete = len(offsets) == end - start + 1
+        with open(record["path"], "rb") as f:
+            f.seek(offsets[0])
+            # a snippet reaching the last word runs to the end of the file
+            data = f.read(offsets[-1] - offsets[0] if complete else -1)
+        text = " ".join(data.decode("utf-8", errors="ignore").split())
+        return ("... " if start > 0 else "") + text + (" ..." if complete else "")
+
+    def read_offsets(self, doc_id: str, start: int, end: int) -> array:
+        """
+        Reads offsets[start:end] of a document's token-offset table. The tables are
+        written at index time; without one, nothing is read and the result is empty.
+        """
+        file_name = offsets_file(self.index_dir, doc_id)
+        offsets = array("I")
+        if not os.path.exists(file_name):
+            return offsets
+        with open(file_name, "rb") as f:
+            f.seek(start * offsets.itemsize)
+            offsets.frombytes(f.read((end - start) * offsets.itemsize))
+        return offsets
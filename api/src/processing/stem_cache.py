@@ -0,0 +1,93 @@
+import os
+import json
+from collections import OrderedDict
+from typing import Dict
+from src.processing.porter_stemmer import PorterStemmer
+from src.processing.fast_stemmer import FastPorterStemmer
+
+STEM_CACHE_FILE = "./docs/stem-cache.json"
+
+
+class StemCache:
+    def __init__(self, stemmer: PorterStemmer = None, max_size: int = 200_000) -> None:
+        """
+        Bounded LRU cache in front of a stemmer, with the same stem() API.
+
+        Args:
+            stemmer (PorterStemmer): stemmer used on cache misses. Defaults to FastPorterStemmer().
+            max_size (int): maximum number of cached words
+        """
+        self.stemmer = stemmer if stemmer is not None else FastPorterStemmer()
+        self.max_size = max_size
+        self.cache: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def stem(self, word: str) -> str:
+        """
+        Returns the cached stem of word, stemming and caching it on a miss.
+
+        Args:
+            word (str): English word
+
+        Returns:
+            str: Stemmed word
+        """
+        stemmed = self.cache.get(word)
+        if stemmed is not None:
+            self.hits += 1
+            self.cache.move_to_end(word)
+            return stemmed
+        self.misses += 1
+        stemmed = self.stemmer.stem(word)
+        self.cache[word] = stemmed
+        if len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+        return stemmed
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the cache size, hits, misses and hit rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def save(self, file_name: str = STEM_CACHE_FILE) -> None:
+        """
+        Saves the cached stems, least recently used first.
+        """
+        os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        with open(file_name, "w", encoding="utf-8") as f:
+            json.dump(self.cache, f)
+
+    def load(self, file_name: str = STEM_CACHE_FILE) -> None:
+        """
+        Warms the cache from a saved file, if it exists.
+        """
+        if not os.path.exists(file_name):
+            return
+        with open(file_name, "r", encoding="utf-8") as f:
+            for word, stemmed in json.load(f).items():
+                self.cache[word] = stemmed
+        while len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+
+
+_shared_cache: StemCache = None
+
+
+def get_stemmer() -> StemCache:
+    """
+    Returns the process-wide stem cache shared by indexing and querying,
+    warmed from STEM_CACHE_FILE the first time it is created.
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = StemCache()
+        _shared_cache.load()
+    return _shared_cache
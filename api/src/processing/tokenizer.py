@@ -1,8 +1,10 @@
 import os
 import re
 import math
-from typing import List
-from src.processing.porter_stemmer import PorterStemmer
+import codecs
+from bisect import bisect_right
+from typing import Iterator, List, Tuple
+from src.processing.stem_cache import get_stemmer
 
 # https://regex101.com/
 
@@ -13,7 +15,7 @@ class Tokenizer:
             stop_words_file_path (str, optional): . Defaults to '../data/Stopword-List.txt'.
         """
         self.stop_words: List[str] = []
-        self.stemmer = PorterStemmer()
+        self.stemmer = get_stemmer()
 
         self.load_stop_words(stop_words_file_path)
 
@@ -163,6 +165,83 @@ class Tokenizer:
 
         return tokens
 
+    def stream_words(self, file_name: str, chunk_size: int = 64 * 1024) -> Iterator[Tuple[int, str]]:
+        """
+        Reads a file in fixed-size chunks and yields (position, word) pairs, where the
+        position is the word's index among all pattern matches (as in process_file).
+        A word touching the end of a chunk is carried into the next chunk, so words
+        split across chunk boundaries are yielded once and whole.
+
+        Args:
+            file_name (str): file to read
+            chunk_size (int): characters read per chunk
+
+        Returns:
+            Iterator[Tuple[int, str]]: word positions and raw words
+        """
+        pattern = re.compile(self.get_pattern())
+        position = 0
+        carry = ""
+        with open(file_name, "r", encoding="utf-8", errors="ignore") as file:
+            while True:
+                chunk = file.read(chunk_size)
+                text = carry + chunk
+                carry = ""
+                for match in pattern.finditer(text):
+                    if chunk and match.end() == len(text):
+                        carry = text[match.start():]
+                        break
+                    yield position, match.group()
+                    position += 1
+                if not chunk:
+                    return
+
+    def stream_word_offsets(self, file_name: str, chunk_size: int = 64 * 1024) -> Iterator[Tuple[int, str, int]]:
+        """
+        Same as stream_words, but also yields the byte offset of every word in the file
+        (slower, only used where the offsets are kept).
+        The file is decoded with surrogateescape so invalid bytes can still be counted;
+        they are dropped before matching, as when reading with errors="ignore".
+
+        Returns:
+            Iterator[Tuple[int, str, int]]: word positions, raw words and byte offsets
+        """
+        pattern = re.compile(self.get_pattern())
+        invalid = re.compile("[\udc80-\udcff]")
+        wide = re.compile("[^\x00-\x7f]")
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="surrogateescape")
+        position = 0
+        carry = ""
+        # byte offset of the start of raw
+        base = 0
+        with open(file_name, "rb") as file:
+            while True:
+                chunk = file.read(chunk_size)
+                raw = carry + decoder.decode(chunk, final=not chunk)
+                carry = ""
+                # gaps[i] is where the i-th invalid byte sat in text, used to map text indexes back to raw
+                gaps = [m.start() - i for i, m in enumerate(invalid.finditer(raw))]
+                text = invalid.sub("", raw) if gaps else raw
+                # wide_chars[i] is one past the i-th multi-byte character, extra[i] the bytes
+                # beyond one per character taken by the characters up to it
+                wide_chars = [0]
+                extra = [0]
+                for m in wide.finditer(raw):
+                    wide_chars.append(m.start() + 1)
+                    extra.append(extra[-1] + len(m.group().encode("utf-8", "surrogateescape")) - 1)
+                consumed = len(raw)
+                for match in pattern.finditer(text):
+                    start = match.start() + bisect_right(gaps, match.start()) if gaps else match.start()
+                    if chunk and match.end() == len(text):
+                        carry = raw[start:]
+                        consumed = start
+                        break
+                    yield position, match.group(), base + start + extra[bisect_right(wide_chars, start) - 1]
+                    position += 1
+                if not chunk:
+                    return
+                base += consumed + extra[bisect_right(wide_chars, consumed) - 1]
+
 if __name__ == "__main__":
     tk = Tokenizer()
     print(tk.split_string_by_sqrt("desenvolvimentocientficoetecnolgicoabstract"))
\ No newline at end of file
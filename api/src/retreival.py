@@ -2,47 +2,106 @@ from src.processing.processor import IndexProcessor
 from src.processing.word_suggestor import WordSuggestor
 from src.processing.word_corrector import WordCorrector
 from src.processing.tokenizer import Tokenizer
+from src.processing.snippets import SnippetGenerator
 from src.models.boolean_model import BooleanModel
 from src.models.extended_boolean import ExtendedBooleanModel
 from src.models.vector_space_model import VectorSpaceModel
+from src.models.bm25_model import BM25Model
+from src.models.phrase_model import PhraseModel
 from src.ml_workbench.knn_classifier import KNNClassifier
-from src.utils import list_files, read_summary
+from src.utils import list_files
 import re
 from typing import List, Tuple
 
 class InformationRetrieval:
-    def __init__(self):
+    def __init__(self, use_mmap: bool = True, bm25_threshold: float = 0.0):
         self.title = "Information Retrieval System"
         self.description = "This is a simple information retrieval system that uses the boolean model to search for documents in a collection of research papers."
         self.dict_set = None
         self.inv_idx = None
         self.pos_idx = None
+        self.bi_idx = None
+        self.use_mmap = use_mmap
+        # BM25 scores are not bounded like cosine scores, so alpha only applies to tfidf
+        self.bm25_threshold = bm25_threshold
         self.processor = IndexProcessor(data_dir="./data", exclude_files=["Stopword-List.txt"])
         self.load_data()
         
         self.tokenizer = Tokenizer()
         self.suggestions_cache = {}
+        self.build_models()
+        
+        self.knn_classifier = KNNClassifier(data_dir="./data", index_file="./docs/inv-index.json", k=3, use_tts=True)
+
+    def load_data(self) -> None:
+        """
+        Load the data from the data directory and process it using the IndexProcessor.
+        With memory-mapped indexes the saved binary files are opened directly when the
+        manifest shows no changed inputs.
+        """
+        if not (self.use_mmap and self.processor.load_saved_indexes()):
+            self.processor.process_data()
+        self.refresh_data()
+
+    def refresh_data(self) -> None:
+        """
+        Picks up the processor's current indexes, dictionary, deletions and document store
+        """
+        if self.use_mmap:
+            # the models share one lazily decoded view of the saved binary indexes
+            self.inv_idx, self.pos_idx = self.processor.open_mapped_indexes()
+            self.bi_idx = self.processor.open_mapped_biwords()
+            self.processor.release_indexes()
+        else:
+            self.inv_idx = self.processor.inv_idx.index
+            self.pos_idx = self.processor.pos_idx.index
+            self.bi_idx = self.processor.bi_idx.index if self.processor.biword_index else None
+        self.dict_set = self.processor.dict_set
+        self.deleted_docs = self.processor.deleted_docs()
+        self.doc_store = self.processor.doc_store
+
+    def build_models(self) -> None:
+        """
+        Builds the word suggestion/correction helpers and the retrieval models on the current indexes
+        """
+        self.suggestions_cache = {}
         self.word_suggestor = WordSuggestor(self.dict_set)
         self.word_corrector = WordCorrector(self.dict_set)
         
         all_docs = list_files('./data', exclude_files=["Stopword-List.txt"])
-        self.boolean_model = BooleanModel(self.inv_idx, all_docs_files=all_docs)
+        self.boolean_model = BooleanModel(self.inv_idx, doc_ids=self.doc_store.docs.keys())
         self.extended_boolean_model = ExtendedBooleanModel(self.pos_idx, all_docs_files=all_docs)
+        self.phrase_model = PhraseModel(self.pos_idx, self.bi_idx)
         self.vsm = VectorSpaceModel(self.inv_idx)
-        
-        self.knn_classifier = KNNClassifier(data_dir="./data", index_file="./docs/inv-index.json", k=3, use_tts=True)
+        self.bm25_model = BM25Model(self.inv_idx, self.doc_store)
+        self.snippet_generator = SnippetGenerator(self.pos_idx, self.doc_store, index_dir=self.processor.index_dir)
 
-    def load_data(self) -> None:
+    def add_document(self, file: str) -> str:
         """
-        Load the data from the data directory and process it using the IndexProcessor
+        Indexes a new (or changed) file without a full reindex and rebuilds the models
         """
-        inv_idx, pos_idx, dict_set = self.processor.process_data()
-        self.inv_idx = inv_idx.index
-        self.pos_idx = pos_idx.index
-        self.dict_set = dict_set    
-        
-        with open('./logs/metadata.log', 'r') as f:
-            self.metadata = f.read()
+        doc_id = self.processor.add_document(file)
+        self.refresh_data()
+        self.build_models()
+        return doc_id
+
+    def update_document(self, file: str) -> str:
+        """
+        Re-indexes a changed file and rebuilds the models
+        """
+        doc_id = self.processor.update_document(file)
+        self.refresh_data()
+        self.build_models()
+        return doc_id
+
+    def delete_document(self, file: str) -> str:
+        """
+        Deletes a file from the index and rebuilds the models
+        """
+        doc_id = self.processor.delete_document(file)
+        self.refresh_data()
+        self.build_models()
+        return doc_id
 
     def cache_suggestions(self, word, suggestions):
         self.suggestions_cache[word] = suggestions
@@ -50,15 +109,17 @@ class InformationRetrieval:
     def get_cached_suggestions(self, word):
         return self.suggestions_cache.get(word, [])
     
-    def search(self, query: str, alpha: float = 0.05) -> List:
+    def search(self, query: str, alpha: float = 0.05, k: int = None, ranking: str = "tfidf") -> List:
         query = self.tokenizer.remove_stop_words(query)
         query_type = self.query_type(query)
-        if query_type == 'boolean':
+        if query_type == 'phrase':
+            return self.phrase_search(query)
+        elif query_type == 'boolean':
             return self.boolean_search(query)
         elif query_type == 'proximity':
             return self.proximity_search(query)
         elif query_type == 'ranked':
-            return self.vector_search(query, alpha)
+            return self.vector_search(query, alpha, k, ranking)
         else:
             return []
     
@@ -71,13 +132,20 @@ class InformationRetrieval:
 
 
         Returns:
-            List[Tuple[str, float, str]]: Returns a list of documents with their scores and summaries
+            List[Tuple[str, float, str]]: Returns a list of documents with their scores and snippets
         """
         docs =  self.boolean_model.search(query)
-        summaries = [read_summary(self.metadata, doc) for doc in docs]        
+        docs = [doc for doc in docs if doc not in self.deleted_docs]
+        summaries = self.snippet_generator.snippets(docs, query)
         docs = [(doc_id, round(100.0, 2), summary) for doc_id, summary in zip(docs, summaries)]        
         return docs
     
+    def explain(self, query: str) -> str:
+        """
+        Returns the boolean model's execution plan for a boolean query
+        """
+        return self.boolean_model.explain(self.tokenizer.remove_stop_words(query))
+
     def proximity_search(self, query: str) -> List:
         """
         search for documents using the procimity search
@@ -87,32 +155,111 @@ class InformationRetrieval:
 
 
         Returns:
-            List[Tuple[str, float, str]]: Returns a list of documents with their scores and summaries
+            List[Tuple[str, float, str]]: Returns a list of documents with their scores and snippets
         """
         docs = self.extended_boolean_model.search(query)
-        summaries = [read_summary(self.metadata, doc) for doc in docs]
+        docs = [doc for doc in docs if doc not in self.deleted_docs]
+        summaries = self.snippet_generator.snippets(docs, query)
+        docs = [(doc_id, round(100.0, 2), summary) for doc_id, summary in zip(docs, summaries)]
+        return docs
+    
+    def phrase_search(self, query: str) -> List:
+        """
+        search for documents containing an exact phrase
+
+        Args:
+            query (str): quoted phrase, e.g. '"heart failure"'
+
+
+        Returns:
+            List[Tuple[str, float, str]]: Returns a list of documents with their scores and snippets
+        """
+        docs = self.phrase_model.search(query)
+        docs = [doc for doc in docs if doc not in self.deleted_docs]
+        summaries = self.snippet_generator.snippets(docs, query)
         docs = [(doc_id, round(100.0, 2), summary) for doc_id, summary in zip(docs, summaries)]
         return docs
     
-    def vector_search(self, query: str, alpha: float) -> List[Tuple[str, float, str]]:
+    def vector_search(self, query: str, alpha: float, k: int = None, ranking: str = "tfidf") -> List[Tuple[str, float, str]]:
         """
-        search for documents using the vector space model
+        search for documents using the vector space model or BM25
 
         Args:
             query (str): user query string
-            alpha (float): the alpha parameter for the vector space model
+            alpha (float): the alpha parameter for the vector space model, the minimum cosine score;
+                BM25 results are cut at bm25_threshold instead
+            k (int): number of top documents to return, None for all documents above the minimum score
+            ranking (str): "tfidf" for the cosine vector space model, "bm25" for BM25
+
+
+        Returns:
+            List[Tuple[str, float, str]]: Returns a list of documents with their scores and snippets
+        """
+        model = self.ranking_model(ranking)
+        if model is None:
+            return []
+        docs = model.search(query, k=self.fetch_size(k), min_score=self.min_score(alpha, ranking))
+        return self.ranked_results(query, docs, k)
+
+    def search_batch(self, queries: List[str], alpha: float = 0.05, k: int = None, ranking: str = "tfidf") -> List[List]:
+        """
+        search for many queries at once. Ranked queries are scored together with one
+        sparse matrix product, other query types go through search one by one.
+
+        Args:
+            queries (List[str]): user query strings
+            alpha (float): the minimum cosine score of tfidf results, BM25 results are cut at bm25_threshold
+            k (int): number of top documents per ranked query, None for all documents above the minimum score
+            ranking (str): "tfidf" for the cosine vector space model, "bm25" for BM25
 
 
         Returns:
-            List[Tuple[str, float, str]]: Returns a list of documents with their scores and summaries
+            List[List[Tuple[str, float, str]]]: Returns, per query, a list of documents with their scores and snippets
+        """
+        model = self.ranking_model(ranking)
+        cleaned = [self.tokenizer.remove_stop_words(query) for query in queries]
+        ranked = [i for i, query in enumerate(cleaned) if self.query_type(query) == 'ranked']
+        results = [self.search(query, alpha, k, ranking) if self.query_type(query) != 'ranked' else [] for query in queries]
+        if model is None or not ranked:
+            return results
+        batch = model.search_many([cleaned[i] for i in ranked], k=self.fetch_size(k), min_score=self.min_score(alpha, ranking))
+        for i, docs in zip(ranked, batch):
+            results[i] = self.ranked_results(cleaned[i], docs, k)
+        return results
+
+    def ranking_model(self, ranking: str):
+        """
+        Returns the ranked retrieval model for "tfidf" or "bm25", None for anything else
+        """
+        if ranking == "bm25":
+            return self.bm25_model
+        if ranking == "tfidf":
+            return self.vsm
+        return None
+
+    def min_score(self, alpha: float, ranking: str) -> float:
+        """
+        Returns the score ranked results must exceed: alpha for "tfidf", bm25_threshold for "bm25"
+        """
+        return self.bm25_threshold if ranking == "bm25" else alpha
+
+    def fetch_size(self, k: int) -> int:
+        # deleted documents may take some of the top places
+        return k + len(self.deleted_docs) if k is not None else None
+
+    def ranked_results(self, query: str, docs: List[Tuple[str, float]], k: int) -> List[Tuple[str, float, str]]:
+        """
+        Drops deleted documents, keeps the top k and adds the snippets
         """
-        docs =  self.vsm.search(query)
-        summaries = [read_summary(self.metadata, doc_id) for doc_id, _ in docs]
-        docs = [(doc_id, round(score, 6), summary) for (doc_id, score), summary in zip(docs, summaries) if score > alpha]
+        docs = [(doc_id, score) for doc_id, score in docs if doc_id not in self.deleted_docs][:k]
+        summaries = self.snippet_generator.snippets([doc_id for doc_id, _ in docs], query)
+        docs = [(doc_id, round(score, 6), summary) for (doc_id, score), summary in zip(docs, summaries)]
         return docs
     
     def query_type(self, query: str) -> str:
-        if re.search(r'AND|OR|NOT', query):
+        if re.match(r'^\s*"[^"]+"\s*$', query):
+            return 'phrase'
+        elif re.search(r'AND|OR|NOT', query):
             return 'boolean'
         elif re.search(r'/(\d*)$', query):
             return 'proximity'
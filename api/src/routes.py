@@ -0,0 +1,67 @@
+from flask import Flask, request, jsonify
+
+
+def create_app(app_instance) -> Flask:
+    """
+    Creates the Flask app serving the search API.
+
+    Args:
+        app_instance (InformationRetrieval): retrieval system the routes query
+
+    Returns:
+        Flask: the app, run it with app.run() or through flask run
+    """
+    app = Flask(__name__)
+
+    @app.route('/get_suggestions', methods=['POST'])
+    def get_suggestions():
+        data = request.get_json()
+        query = data['query']
+        if query:
+            check_word = app_instance.tokenizer.tokenize(query)[-1].lower()
+            if check_word is not None and len(check_word) > 0:
+                suggestions = app_instance.get_cached_suggestions(check_word)
+                if not suggestions:
+                    suggestions = app_instance.word_suggestor.find_words(check_word)
+                    app_instance.cache_suggestions(check_word, suggestions)
+                return jsonify({'suggestions': suggestions})
+
+        return jsonify({'suggestions': []})
+
+    @app.route('/search', methods=['POST'])
+    def search():
+        data = request.get_json()
+        query = data['query']
+        alpha = data.get('alpha', 0.5)
+        ranked_docs = app_instance.search(query, alpha, k=data.get('k'), ranking=data.get('ranking', 'tfidf'))
+        return jsonify(results_json(ranked_docs))
+
+    @app.route('/search_batch', methods=['POST'])
+    def search_batch():
+        data = request.get_json()
+        queries = data['queries']
+        alpha = data.get('alpha', 0.5)
+        results = app_instance.search_batch(queries, alpha, k=data.get('k'), ranking=data.get('ranking', 'tfidf'))
+        return jsonify({'results': [results_json(ranked_docs) for ranked_docs in results]})
+
+    @app.route('/get_corrections', methods=['POST'])
+    def get_corrections():
+        data = request.get_json()
+        query = data['query']
+        corrected_query = app_instance.word_corrector.correct_query(query)
+        if corrected_query == query:
+            return jsonify({"corrected_query": ""})
+        return jsonify({'corrected_query': corrected_query})
+
+    return app
+
+
+def results_json(ranked_docs) -> dict:
+    """
+    Splits (doc_id, score, summary) results into the docs, ranks and summaries lists of the API.
+    """
+    return {
+        'docs': [doc[0] for doc in ranked_docs],
+        'ranks': [doc[1] for doc in ranked_docs],
+        'summaries': [doc[2] for doc in ranked_docs],
+    }
@@ -74,7 +74,7 @@ def read_summary(log, doc_id: str) -> str:
     data = "[" + log[: (len(log) - 2)] + "]"
     data = json.loads(data)
     for entry in data:
-        entry_id = entry['doc_id'].split("_")[1]
+        entry_id = entry['doc_id'].split("_", 1)[1]
         if str(entry_id) == str(doc_id):
             return entry["static_summary"]
     
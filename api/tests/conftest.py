@@ -0,0 +1,18 @@
+import os
+import shutil
+import pytest
+
+STOPWORDS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "Stopword-List.txt")
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """
+    Runs the test inside an empty copy of the api directory layout: a data directory
+    holding only the stopword list, and no docs, indexes or logs.
+    """
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    shutil.copy(STOPWORDS, data_dir)
+    monkeypatch.chdir(tmp_path)
+    return data_dir
@@ -0,0 +1,31 @@
+import random
+from src.indexer.skip_postings import SkipPostings, intersect, intersect_many
+from src.models.boolean_model import BooleanModel
+from src.models.extended_boolean import ExtendedBooleanModel
+from src.models.phrase_model import PhraseModel
+
+POS_IDX = {
+    "heart": {"1_10": [4], "2_2": [0], "3_notes_v2": [7], "4_atlas": [1]},
+    "failur": {"1_10": [5], "2_2": [9], "3_notes_v2": [8]},
+}
+INV_IDX = {term: {doc_id: len(positions) for doc_id, positions in postings.items()} for term, postings in POS_IDX.items()}
+
+
+def test_intersections_match_sets():
+    rng = random.Random(5)
+    for _ in range(500):
+        universe = rng.randint(1, 5000)
+        lists = [rng.sample(range(universe), rng.randint(0, min(universe, rng.choice([5, 50, 2000])))) for _ in range(rng.randint(2, 4))]
+        postings = [SkipPostings(docs) for docs in lists]
+        expected = set(lists[0]).intersection(*lists[1:])
+        assert list(intersect(postings[0], postings[1]).docs) == sorted(set(lists[0]) & set(lists[1]))
+        assert list(intersect_many(postings).docs) == sorted(expected)
+
+
+def test_underscored_names_in_every_model(workspace):
+    boolean = BooleanModel(INV_IDX, {doc_id for postings in INV_IDX.values() for doc_id in postings})
+
+    assert boolean.search("heart AND failure") == ["2", "10", "notes_v2"]
+    assert boolean.search("heart AND NOT failure") == ["atlas"]
+    assert ExtendedBooleanModel(POS_IDX, []).search("heart failure /1") == ["10", "notes_v2"]
+    assert PhraseModel(POS_IDX).search('"heart failure"') == ["10", "notes_v2"]
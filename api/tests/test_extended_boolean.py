@@ -0,0 +1,50 @@
+import itertools
+import random
+from src.models.extended_boolean import ExtendedBooleanModel, proximity_windows
+
+
+def tightest_windows(positions, k):
+    """
+    Brute force: for every position e, the window ending at e starts at the latest
+    position not after e of the term seen longest ago; it is kept if every term
+    occurs by e and the window spans at most k.
+    """
+    windows = []
+    for end in sorted(itertools.chain(*positions)):
+        latest = [max((p for p in term_positions if p <= end), default=None) for term_positions in positions]
+        if None not in latest and end - min(latest) <= k:
+            windows.append((min(latest), end))
+    return windows
+
+
+def within(positions, k):
+    """
+    Brute force over every choice of one position per term.
+    """
+    return any(max(choice) - min(choice) <= k for choice in itertools.product(*positions))
+
+
+def test_windows_match_brute_force():
+    rng = random.Random(3)
+    for _ in range(2000):
+        terms = rng.randint(1, 4)
+        length = rng.randint(1, 40)
+        words = [rng.randrange(terms + 2) for _ in range(length)]
+        positions = [[i for i, word in enumerate(words) if word == term] for term in range(terms)]
+        k = rng.randint(0, 8)
+        windows = proximity_windows(positions, k)
+        if any(not p for p in positions):
+            assert windows == []
+            continue
+        assert windows == tightest_windows(positions, k)
+        assert bool(windows) == within(positions, k)
+
+
+def test_search_sorts_non_numeric_names(workspace):
+    pos_idx = {
+        "heart": {"1_10": [4], "2_2": [0], "3_notes": [7], "4_atlas": [1]},
+        "failur": {"1_10": [5], "2_2": [9], "3_notes": [8], "4_atlas": [2]},
+    }
+    model = ExtendedBooleanModel(pos_idx, [])
+
+    assert model.search("heart failure /1") == ["10", "atlas", "notes"]
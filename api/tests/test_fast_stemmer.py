@@ -0,0 +1,40 @@
+import os
+import random
+import pytest
+from src.processing.fast_stemmer import FastPorterStemmer, corpus_vocabulary
+from src.processing.porter_stemmer import PorterStemmer
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def synthetic_words(count: int, seed: int = 13):
+    """
+    Random stems followed by one or two suffixes from the Porter rule tables, plus the
+    plural, -ed, -ing and -y endings of steps 1a to 1c, in mixed case.
+    """
+    rules = PorterStemmer()
+    suffixes = [*rules.step2_sufixes, *rules.step3_sufixes, *rules.step4_sufixes, "s", "es", "ies", "sses", "ed", "ing", "eed", "y", "e", "ll"]
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    rng = random.Random(seed)
+    words = []
+    for _ in range(count):
+        stem = "".join(rng.choice(letters if rng.random() < 0.6 else "aeiouy") for _ in range(rng.randint(1, 7)))
+        word = stem + "".join(rng.choice(suffixes) for _ in range(rng.randint(0, 2)))
+        words.append(word.upper() if rng.random() < 0.02 else word.capitalize() if rng.random() < 0.05 else word)
+    return words
+
+
+def assert_same_stems(words):
+    reference, fast = PorterStemmer(), FastPorterStemmer()
+    mismatches = [(word, reference.stem(word), fast.stem(word)) for word in words]
+    assert [mismatch for mismatch in mismatches if mismatch[1] != mismatch[2]] == []
+
+
+@pytest.mark.skipif(not os.path.isdir(os.path.join(DATA_DIR, "ResearchPapers")), reason="corpus not available")
+def test_corpus_words_match_porter(monkeypatch):
+    monkeypatch.chdir(os.path.dirname(DATA_DIR))
+    assert_same_stems(corpus_vocabulary())
+
+
+def test_synthetic_words_match_porter():
+    assert_same_stems(synthetic_words(100_000))
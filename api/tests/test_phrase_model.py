@@ -0,0 +1,77 @@
+import random
+import re
+import pytest
+from src.processing.processor import index_words
+from src.processing.stem_cache import get_stemmer
+from src.processing.tokenizer import Tokenizer
+from src.models.phrase_model import PhraseModel
+
+VOCABULARY = ["state", "of", "the", "art", "heart", "failure", "model", "is", "a", "deep", "network", "in"]
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    """
+    Random documents over a small vocabulary with many stop words, and their
+    positional and biword indexes.
+    """
+    rng = random.Random(7)
+    tokenizer, stemmer = Tokenizer(), get_stemmer()
+    texts = {f"{n}_{n}": " ".join(rng.choice(VOCABULARY) for _ in range(60)) for n in range(1, 41)}
+    texts["41_41"] = "the state of the art in heart failure"
+    pos_idx, bi_idx = {}, {}
+    for doc_id, text in texts.items():
+        _, positions, _, stats = index_words(enumerate(re.findall(tokenizer.get_pattern(), text)), doc_id, tokenizer, stemmer)
+        for index, postings in ((pos_idx, positions), (bi_idx, stats["biwords"])):
+            for term, doc_positions in postings.items():
+                index.setdefault(term, {}).update(doc_positions)
+    return texts, pos_idx, bi_idx
+
+
+def word_terms(text):
+    """
+    Returns the index term of every word of text, None for the words that are not indexed.
+    """
+    tokenizer, stemmer = Tokenizer(), get_stemmer()
+    return [
+        stemmer.stem(token) if (token := tokenizer.preprocess(word)) else None
+        for word in re.findall(tokenizer.get_pattern(), text)
+    ]
+
+
+def scan(documents, query):
+    """
+    Brute-force phrase match over the raw words: every kept query word must have
+    the same index term at the same offset in the text.
+    """
+    kept = [(i, term) for i, term in enumerate(word_terms(query)) if term is not None]
+    first = kept[0][0]
+    docs = []
+    for doc_id, words in documents.items():
+        for start in range(len(words)):
+            if all(start + i - first < len(words) and words[start + i - first] == term for i, term in kept):
+                docs.append(doc_id.split("_", 1)[1])
+                break
+    return sorted(docs, key=int)
+
+
+def test_biword_and_positional_paths_agree(corpus):
+    texts, pos_idx, bi_idx = corpus
+    documents = {doc_id: word_terms(text) for doc_id, text in texts.items()}
+    with_biwords, positional = PhraseModel(pos_idx, bi_idx), PhraseModel(pos_idx)
+    rng = random.Random(11)
+    queries = ["state of the art", "state art", "heart failure", "the art in heart"]
+    queries += [" ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(2, 5))) for _ in range(300)]
+    for query in queries:
+        if not with_biwords.terms(query):
+            continue
+        expected = scan(documents, query)
+        assert with_biwords.search(query) == expected, query
+        assert positional.search(query) == expected, query
+
+
+def test_stop_words_keep_their_place(corpus):
+    texts, pos_idx, bi_idx = corpus
+    for model in (PhraseModel(pos_idx, bi_idx), PhraseModel(pos_idx)):
+        assert "41" in model.search('"state of the art"')
+        assert "41" not in model.search('"state art"')
@@ -0,0 +1,45 @@
+import json
+from src.processing.processor import BIWORD_INDEX_FILE, DICT_SET_FILE, INV_INDEX_FILE, POS_INDEX_FILE, IndexProcessor
+
+
+def test_deleted_document_leaves_dict_set(workspace):
+    (workspace / "1.txt").write_text("Heart failure patients were treated.\n")
+    (workspace / "2.txt").write_text("Neural networks learn representations.\n")
+    processor = IndexProcessor(str(workspace))
+    processor.process_data()
+
+    (workspace / "3.txt").write_text("Zebrafish heart genome.\n")
+    processor.add_document(str(workspace / "3.txt"))
+    assert processor.dict_set["zebrafish"] == 1
+    assert processor.dict_set["heart"] == 2
+
+    processor.delete_document(str(workspace / "3.txt"))
+    assert "zebrafish" not in processor.dict_set
+    assert processor.dict_set["heart"] == 1
+    with open(DICT_SET_FILE, "r", encoding="utf-8") as f:
+        assert json.load(f) == processor.dict_set
+
+
+def test_updated_document_replaces_its_vocabulary(workspace):
+    (workspace / "1.txt").write_text("Heart failure patients were treated.\n")
+    processor = IndexProcessor(str(workspace))
+    processor.process_data()
+
+    (workspace / "1.txt").write_text("Heart transplant.\n")
+    processor.update_document(str(workspace / "1.txt"))
+    assert processor.dict_set == {"heart": 1, "transplant": 1}
+
+
+def test_spimi_build_is_served_like_process_data(workspace):
+    for n, text in enumerate(["Heart failure patients were treated.", "Neural networks learn heart rhythms.", "Failure of neural models."], 1):
+        (workspace / f"{n}.txt").write_text(text + "\n")
+    IndexProcessor(str(workspace)).process_data()
+    saved = {name: open(name, "rb").read() for name in (INV_INDEX_FILE, POS_INDEX_FILE, BIWORD_INDEX_FILE)}
+
+    processor = IndexProcessor(str(workspace))
+    processor.process_spimi(memory_budget=1024)
+
+    assert {name: open(name, "rb").read() for name in saved} == saved
+    restarted = IndexProcessor(str(workspace))
+    assert restarted.load_saved_indexes()
+    assert restarted.dict_set == processor.dict_set
@@ -0,0 +1,68 @@
+import random
+from src.models.boolean_model import BooleanModel
+
+TERMS = ["heart", "model", "data", "graph", "cell", "zebra"]
+
+
+def random_tree(rng, depth):
+    """
+    Random query tree: ("TERM", word), ("NOT", tree) or (op, [trees]).
+    """
+    if depth == 0 or rng.random() < 0.3:
+        return ("TERM", rng.choice(TERMS))
+    if rng.random() < 0.25:
+        return ("NOT", random_tree(rng, depth - 1))
+    return (rng.choice(["AND", "OR"]), [random_tree(rng, depth - 1) for _ in range(rng.randint(2, 3))])
+
+
+def render(tree):
+    if tree[0] == "TERM":
+        return tree[1]
+    if tree[0] == "NOT":
+        return "NOT " + render(tree[1])
+    return "(" + f" {tree[0]} ".join(render(child) for child in tree[1]) + ")"
+
+
+def evaluate(tree, inv_idx, docs):
+    """
+    Brute-force set evaluation of a query tree.
+    """
+    if tree[0] == "TERM":
+        return set(inv_idx.get(tree[1], {}))
+    if tree[0] == "NOT":
+        return docs - evaluate(tree[1], inv_idx, docs)
+    results = [evaluate(child, inv_idx, docs) for child in tree[1]]
+    return set.intersection(*results) if tree[0] == "AND" else set.union(*results)
+
+
+def collection(seed=17, num_docs=60):
+    rng = random.Random(seed)
+    docs = {f"{n}_{n}" for n in range(1, num_docs + 1)}
+    inv_idx = {term: {doc: 1 for doc in docs if rng.random() < density} for term, density in zip(TERMS[:-1], (0.05, 0.3, 0.5, 0.8, 0.95))}
+    return inv_idx, docs
+
+
+def names(docs):
+    return sorted((doc.split("_", 1)[1] for doc in docs), key=int)
+
+
+def test_plans_match_brute_force(workspace):
+    inv_idx, docs = collection()
+    model = BooleanModel(inv_idx, docs)
+    rng = random.Random(23)
+    for _ in range(2000):
+        tree = random_tree(rng, 4)
+        query = render(tree)
+        assert model.search(query) == names(evaluate(tree, inv_idx, docs)), query
+
+
+def test_precedence(workspace):
+    inv_idx, docs = collection()
+    model = BooleanModel(inv_idx, docs)
+    heart, model_docs, data = (set(inv_idx[term]) for term in ("heart", "model", "data"))
+
+    assert model.search("heart AND NOT model OR data") == names((heart - model_docs) | data)
+    assert model.search("NOT NOT heart") == names(heart)
+    assert model.search("heart model") == names(heart & model_docs)
+    assert model.search("NOT heart AND NOT model") == names(docs - heart - model_docs)
+    assert model.search("heart AND") == []
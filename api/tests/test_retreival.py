@@ -0,0 +1,53 @@
+import pytest
+from src.processing.tokenizer import Tokenizer
+from src.retreival import InformationRetrieval
+
+
+class FakeModel:
+    """
+    Stands in for a ranking model: records min_score and returns fixed scores.
+    """
+
+    def __init__(self, scores):
+        self.scores = scores
+        self.min_scores = []
+
+    def search(self, query, k=None, min_score=None):
+        self.min_scores.append(min_score)
+        return [(doc, score) for doc, score in self.scores if score > min_score][:k]
+
+    def search_many(self, queries, k=None, min_score=None):
+        return [self.search(query, k, min_score) for query in queries]
+
+
+class FakeSnippets:
+    def snippets(self, docs, query):
+        return ["" for _ in docs]
+
+
+@pytest.fixture
+def retrieval():
+    # the models are replaced, so no index is built
+    retrieval = InformationRetrieval.__new__(InformationRetrieval)
+    retrieval.bm25_threshold = 0.0
+    retrieval.vsm = FakeModel([("1", 0.3), ("2", 0.01)])
+    retrieval.bm25_model = FakeModel([("2", 4.2), ("1", 0.02)])
+    retrieval.deleted_docs = set()
+    retrieval.snippet_generator = FakeSnippets()
+    return retrieval
+
+
+def test_alpha_only_cuts_tfidf_scores(retrieval):
+    assert [doc for doc, _, _ in retrieval.vector_search("heart", 0.05)] == ["1"]
+    assert [doc for doc, _, _ in retrieval.vector_search("heart", 0.05, ranking="bm25")] == ["2", "1"]
+    assert retrieval.bm25_model.min_scores == [0.0]
+
+
+def test_bm25_threshold_applies_to_batches(retrieval, workspace):
+    retrieval.tokenizer = Tokenizer()
+    retrieval.bm25_threshold = 1.0
+
+    results = retrieval.search_batch(["heart", "failure"], 0.05, ranking="bm25")
+
+    assert [[doc for doc, _, _ in docs] for docs in results] == [["2"], ["2"]]
+    assert retrieval.bm25_model.min_scores == [1.0, 1.0]
@@ -0,0 +1,63 @@
+import pytest
+from src.routes import create_app
+
+
+class FakeRetrieval:
+    """
+    Stands in for InformationRetrieval: records the search arguments and
+    returns fixed (doc_id, score, summary) results.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def search(self, query, alpha, k=None, ranking="tfidf"):
+        self.calls.append((query, alpha, k, ranking))
+        return [("12", 0.9, "first summary"), ("7", 0.4, "second summary")][:k]
+
+    def search_batch(self, queries, alpha, k=None, ranking="tfidf"):
+        return [self.search(query, alpha, k, ranking) for query in queries]
+
+
+@pytest.fixture
+def retrieval():
+    return FakeRetrieval()
+
+
+@pytest.fixture
+def client(retrieval):
+    return create_app(retrieval).test_client()
+
+
+def test_search_passes_k_and_ranking(client, retrieval):
+    response = client.post("/search", json={"query": "heart failure", "alpha": 0.1, "k": 1, "ranking": "bm25"})
+
+    assert response.status_code == 200
+    assert response.get_json() == {"docs": ["12"], "ranks": [0.9], "summaries": ["first summary"]}
+    assert retrieval.calls == [("heart failure", 0.1, 1, "bm25")]
+
+
+def test_search_defaults(client, retrieval):
+    response = client.post("/search", json={"query": "heart failure"})
+
+    assert response.get_json()["docs"] == ["12", "7"]
+    assert retrieval.calls == [("heart failure", 0.5, None, "tfidf")]
+
+
+def test_search_batch_returns_one_result_per_query(client, retrieval):
+    response = client.post("/search_batch", json={"queries": ["heart failure", "deep neural"], "k": 1, "ranking": "bm25"})
+
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "results": [
+            {"docs": ["12"], "ranks": [0.9], "summaries": ["first summary"]},
+            {"docs": ["12"], "ranks": [0.9], "summaries": ["first summary"]},
+        ]
+    }
+    assert retrieval.calls == [("heart failure", 0.5, 1, "bm25"), ("deep neural", 0.5, 1, "bm25")]
+
+
+def test_search_batch_without_queries(client):
+    response = client.post("/search_batch", json={"queries": []})
+
+    assert response.get_json() == {"results": []}
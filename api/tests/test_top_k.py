@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from src.models import top_k as top_k_module
+from src.models.top_k import TopKScorer, batch_top_k
+
+
+def random_cases(count: int, seed: int = 5):
+    """
+    Random weight matrices with random queries, k and min_score. Every third matrix has
+    weights rounded to quarters so that scores tie.
+    """
+    rng = np.random.default_rng(seed)
+    for case in range(count):
+        num_docs, num_terms = int(rng.integers(1, 80)), int(rng.integers(1, 15))
+        weights = sp.random(num_docs, num_terms, density=rng.random() * 0.7, random_state=int(rng.integers(1e9)), format="csr")
+        if case % 3 == 0:
+            weights.data = np.round(weights.data * 4) / 4 + 0.25
+        columns = rng.choice(num_terms, size=int(rng.integers(1, min(num_terms, 6) + 1)), replace=False)
+        query = {int(column): float(rng.choice([0.5, 1.0, rng.random() + 0.1])) for column in columns}
+        k = [None, 1, 2, 3, 5, 10, 100][int(rng.integers(7))]
+        min_score = [None, 0.0, 0.1, 0.5, 1.0][int(rng.integers(5))]
+        yield weights, query, k, min_score
+
+
+def brute_force(weights, query, k, min_score):
+    vector = np.zeros(weights.shape[1])
+    for column, weight in query.items():
+        vector[column] = weight
+    scores = weights @ vector
+    ranked = sorted(((row, score) for row, score in enumerate(scores.tolist()) if score > (min_score or 0.0) + 1e-12), key=lambda x: (-x[1], x[0]))
+    return ranked if k is None else ranked[:k]
+
+
+def assert_same_ranking(found, expected):
+    assert len(found) == len(expected)
+    assert np.allclose([score for _, score in found], [score for _, score in expected])
+    # rows may only differ between documents whose scores tie within rounding
+    assert all(a == b or abs(x - y) < 1e-9 for (a, x), (b, y) in zip(found, expected))
+
+
+@pytest.mark.parametrize("dense_share", [0.0, np.inf], ids=["dense", "sparse"])
+def test_top_k_matches_brute_force(monkeypatch, dense_share):
+    monkeypatch.setattr(top_k_module, "DENSE_SHARE", dense_share)
+    for weights, query, k, min_score in random_cases(600):
+        assert_same_ranking(TopKScorer(weights).top_k(query, k, min_score), brute_force(weights, query, k, min_score))
+
+
+def test_batch_top_k_matches_brute_force():
+    for weights, query, k, min_score in random_cases(600):
+        vector = np.zeros(weights.shape[1])
+        for column, weight in query.items():
+            vector[column] = weight
+        found = batch_top_k(weights, sp.csr_matrix(vector), k, min_score)[0]
+        assert_same_ranking(found, brute_force(weights, query, k, min_score))
@@ -0,0 +1,43 @@
+from src.indexer.binary_index import write_index
+from src.indexer.mapped_index import MappedIndex
+from src.models.vector_space_model import VectorSpaceModel, index_fingerprint
+
+INDEX = {
+    "heart": {"1_a": 2, "3_c": 1},
+    "failur": {"1_a": 1},
+    "neural": {"2_b": 3, "3_c": 1},
+}
+
+
+def test_dict_and_mapped_fingerprints_match(tmp_path):
+    file_name = str(tmp_path / "inv-index.bin")
+    write_index(file_name, INDEX, positional=False)
+    mapped = MappedIndex(file_name)
+
+    assert index_fingerprint(INDEX) == index_fingerprint(mapped)
+    assert index_fingerprint(INDEX) != index_fingerprint({**INDEX, "failur": {"1_a": 2}})
+    mapped.close()
+
+
+def test_rows_follow_document_numbers(workspace):
+    vsm = VectorSpaceModel(INDEX)
+
+    assert vsm.document_ids == ["a", "b", "c"]
+    assert vsm.search("neural", min_score=0)[0][0] == "b"
+
+
+def test_warm_construction_over_mapped_index_reads_no_postings(workspace, monkeypatch):
+    file_name = "inv-index.bin"
+    write_index(file_name, INDEX, positional=False)
+    VectorSpaceModel(MappedIndex(file_name))
+
+    def decode_postings(*args):
+        raise AssertionError("postings decoded while the matrix cache is current")
+
+    monkeypatch.setattr("src.indexer.mapped_index.decode_postings", decode_postings)
+    mapped = MappedIndex(file_name)
+    vsm = VectorSpaceModel(mapped)
+
+    assert mapped.cache == {}
+    assert vsm.document_ids == ["a", "b", "c"]
+    assert [doc for doc, _ in vsm.search("failure", min_score=0)] == ["a"]